@@ -1,30 +1,37 @@
-import os
-import re
 import json
-import tempfile
-import dateutil.parser
+import asyncio
+import logging
+import contextlib
 from datetime import datetime
+from typing import Optional
 from dotenv import load_dotenv
 from fastapi import APIRouter, File, UploadFile, Form, Query, Request, Body
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-import google.generativeai as genai
-from fastapi import UploadFile, File, Form
-from fastapi.responses import JSONResponse
-from typing import Optional
-import re
-import tempfile
-import docx2txt
-import PyPDF2
-import io
 
-from core.recommender import extract_resume_text, extract_skills_with_llm, match_careers
+from core.recommender import (
+    compact_resume_text, extract_experience_from_text, extract_resume_from_bytes, extract_skills_with_llm,
+    format_career_matches, match_careers, parse_job_experience, skill_batcher
+)
+from core.document_extractor import DocumentError, detect_format, extract_document_text, read_upload
 from core.skill_extractor import extract_skills_from_resume
 from core.career_matcher import generate_career_paths
-from core.salary_fetcher import fetch_salary_samples
+from core.salary_fetcher import fetch_salary_samples, fetch_salary_samples_batch, salary_service
+from core.embedder import embedding_cache_stats, shared_store
+from core.llm_gateway import generate_text, get_gateway, stream_text
+from core.streaming import JSONFieldStreamParser, sse_event
+from core.llm_cache import llm_cache
+from core.readiness import readiness
+from core.metrics import render_prometheus
+from core.executor import PoolSaturatedError, run_stage, stage_pool
+from core.job_index import get_job_index
+from core.skill_matcher import get_skill_matcher
+from core.resume_store import resume_store
+from core.semantic_cache import career_path_cache
+from core.bulk_processor import spool_uploads, stream_bulk_ndjson
+from core.task_queue import InvalidWebhookError, task_queue
 
 load_dotenv()
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
 
 router = APIRouter()
 
@@ -33,72 +40,172 @@ async def root():
     return {"message": "AI Career Recommender API is running!"}
 
 
+@router.get("/ready")
+async def ready():
+    status = readiness()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+
+def resume_not_found(resume_id):
+    return JSONResponse(status_code=404, content={"error": f"Unknown or expired resume_id: {resume_id}"})
+
+
+async def analyze_resume(file_bytes: bytes, filename: str):
+    resume_data = await run_stage("parse", extract_resume_from_bytes, file_bytes, filename)
+    resume_text = resume_data.get("text", "")
+    experience = resume_data.get("experience", 0)
+
+    skills = await extract_skills_with_llm(resume_text)
+    skills_list = [s.strip().lower() for s in skills.split(",") if s.strip()]
+
+    top_matches = await run_stage("match", match_careers, skills_list, 3, experience, in_process=True)
+    matched_careers = format_career_matches(top_matches)
+
+    # Keep the parsed resume so later calls can pass resume_id instead of re-uploading
+    session = resume_store.put(
+        resume_text,
+        resume_data.get("sections", {}),
+        experience,
+        sorted(set(skills_list + get_skill_matcher().find(resume_text))),
+    )
+
+    return {
+        "resume_id": session.id,
+        "text": resume_text,
+        "experience": experience,
+        "skills": skills_list,
+        "careers": matched_careers
+    }
+
+
 @router.post("/upload-resume")
 async def upload_resume(file: UploadFile = File(...)):
-    tmp_path = ""
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-            tmp.write(await file.read())
-            tmp_path = tmp.name
-
-        resume_data = extract_resume_text(tmp_path)
-        resume_text = resume_data.get("text", "")
-        experience = resume_data.get("experience", 0)
-
-        skills = extract_skills_with_llm(resume_text)
-        skills_list = [s.strip().lower() for s in skills.split(",") if s.strip()]
-
-        top_matches = match_careers(skills_list)
-        matched_careers = [
-            {
-                "title": career.get("title", "Untitled Role"),
-                "description": career.get("description", "No description provided."),
-                "score": round(score, 3)
-            }
-            for career, score in top_matches
-        ]
-
-        return JSONResponse(content={
-            "text": resume_text,
-            "experience": experience,
-            "skills": skills_list,
-            "careers": matched_careers
-        })
+        file_bytes = await read_upload(file)
+        return JSONResponse(content=await analyze_resume(file_bytes, file.filename))
 
+    except DocumentError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    except PoolSaturatedError:
+        raise
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
-    finally:
-        if tmp_path and os.path.exists(tmp_path):
-            os.remove(tmp_path)
+
+
+@router.post("/bulk-upload-resumes")
+async def bulk_upload_resumes(
+    files: list[UploadFile] = File(...),
+    use_llm: bool = Form(False),
+    top_k: int = Form(3),
+):
+    # Accepts many PDF/DOCX files and/or .zip archives; one JSON line per resume
+    if top_k < 1:
+        return JSONResponse(status_code=400, content={"error": "top_k must be at least 1"})
+    # The response streams after this handler returns, by which point FastAPI has closed the uploads
+    spooled = await asyncio.to_thread(spool_uploads, files)
+    return StreamingResponse(
+        stream_bulk_ndjson(spooled, use_llm=use_llm, top_k=top_k),
+        media_type="application/x-ndjson",
+    )
 
 
 @router.post("/extract-skills")
 async def extract_skills(text: str = Form(...)):
-    skills = extract_skills_from_resume(text)
+    skills = await extract_skills_from_resume(text, compact=False)
     return {"skills": skills}
 
 
 @router.post("/recommend-careers")
 async def recommend_careers(skills: str = Form(...), experience: int = Form(0)):
     skill_list = [s.strip().lower() for s in skills.split(",") if s.strip()]
-    careers = generate_career_paths(skill_list, experience)
+    careers = await generate_career_paths(skill_list, experience)
     return {"careers": careers}
 
 
 @router.get("/salary")
-async def get_salary(job_title: str = Query(...)):
-    samples = fetch_salary_samples(job_title)
+async def get_salary(job_title: str = Query(...), location: str = Query("United States")):
+    samples = await fetch_salary_samples(job_title, location)
     return {"salaries": samples}
 
 
+class SalaryBatchRequest(BaseModel):
+    job_titles: list[str]
+    location: str = "United States"
+
+
+@router.post("/salary/batch")
+async def get_salary_batch(data: SalaryBatchRequest):
+    salaries = await fetch_salary_samples_batch(data.job_titles, data.location)
+    return {"salaries": salaries}
+
+
+@router.get("/metrics")
+async def metrics():
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@router.get("/stats")
+async def stats():
+    return {
+        "skill_cache": embedding_cache_stats(),
+        "llm_cache": llm_cache.stats(),
+        "salary": salary_service.stats(),
+        "worker_pool": stage_pool.stats(),
+        "resume_store": resume_store.stats(),
+        "career_path_cache": career_path_cache.stats(),
+        "skill_batcher": skill_batcher.stats(),
+        "llm_router": get_gateway().router.stats(),
+        "vector_store": shared_store.stats(),
+        # SQLite query; keep it off the event loop like the other task endpoints
+        "task_queue": await asyncio.to_thread(task_queue.stats),
+    }
+
+
 @router.post("/missing-skills")
-async def get_missing_skills(resume_skills: list[str] = Body(...), job_skills: list[str] = Body(...)):
+async def get_missing_skills(
+    job_skills: list[str] = Body(...),
+    resume_skills: Optional[list[str]] = Body(None),
+    resume_id: Optional[str] = Body(None),
+):
+    if resume_id:
+        session = resume_store.get(resume_id)
+        if session is None:
+            return resume_not_found(resume_id)
+        resume_skills = session.skills
+    if resume_skills is None:
+        return JSONResponse(status_code=400, content={"error": "Provide resume_skills or resume_id"})
+
     resume_set = set(s.lower().strip() for s in resume_skills)
     job_set = set(s.lower().strip() for s in job_skills)
     missing = list(job_set - resume_set)
     return {"missing_skills": missing}
 
 
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+@router.post("/chatbot/stream")
+async def career_chatbot_stream(request: Request):
+    body = await request.json()
+    message = body.get("message")
+    if not message:
+        return JSONResponse(status_code=400, content={"error": "Please provide a valid question."})
+
+    async def events():
+        try:
+            # aclosing: leaving the loop closes the gateway stream right away, which stops upstream generation
+            async with contextlib.aclosing(stream_text(message)) as stream:
+                async for chunk in stream:
+                    if await request.is_disconnected():
+                        break
+                    yield sse_event("token", {"text": chunk})
+            yield sse_event("done", {})
+        except Exception as e:
+            yield sse_event("error", {"error": str(e)})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
 @router.post("/chatbot")
 async def career_chatbot(request: Request):
     try:
@@ -107,44 +214,13 @@ async def career_chatbot(request: Request):
         if not message:
             return {"answer": "Please provide a valid question."}
 
-        try:
-            model = genai.GenerativeModel("gemini-1.5-pro")
-            response = model.generate_content(message)
-        except Exception as e:
-            if "429" in str(e) or "quota" in str(e).lower():
-                print("Gemini PRO quota hit — falling back to flash...")
-                model = genai.GenerativeModel("gemini-1.5-flash")
-                response = model.generate_content(message)
-            else:
-                raise e
-
-        return {"answer": response.text.strip()}
+        answer = await generate_text(message)
+        return {"answer": answer}
 
     except Exception as e:
         return {"answer": f"Error: {str(e)}"}
 
 
-def extract_text_from_pdf(file_bytes: bytes) -> str:
-    text = ""
-    try:
-        reader = PyPDF2.PdfReader(io.BytesIO(file_bytes))
-        for page in reader.pages:
-            text += page.extract_text() or ""
-    except Exception as e:
-        print("PDF extraction error:", e)
-    return text
-
-def extract_text_from_docx(file_bytes: bytes) -> str:
-    try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".docx") as tmp:
-            tmp.write(file_bytes)
-            tmp_path = tmp.name
-        text = docx2txt.process(tmp_path)
-    except Exception as e:
-        print("DOCX extraction error:", e)
-        text = ""
-    return text
-
 def clean_and_split_skills(text):
     if isinstance(text, list):
         items = text
@@ -159,53 +235,48 @@ def clean_and_split_skills(text):
         if s.strip() and s.strip().isalpha() and len(s.strip()) > 1
     ))
 
-import logging
-from fastapi import UploadFile, File, Form
-from fastapi.responses import JSONResponse
-from typing import Optional
 
 @router.post("/compare-job")
 async def compare_job(
-    resume_file: UploadFile = File(...),
     job_text: str = Form(...),
-    experience: Optional[int] = Form(0)
+    resume_file: Optional[UploadFile] = File(None),
+    resume_id: Optional[str] = Form(None),
+    experience: Optional[int] = Form(None)
 ):
     try:
-        # Read bytes from the uploaded file
-        file_bytes = await resume_file.read()
-
-        # Extract text depending on file type
-        content = ""
-        if resume_file.filename.lower().endswith(".pdf"):
-            content = extract_text_from_pdf(file_bytes)
-        elif resume_file.filename.lower().endswith(".docx"):
-            content = extract_text_from_docx(file_bytes)
+        if resume_id:
+            # Reuse the text and skills parsed by /upload-resume
+            session = resume_store.get(resume_id)
+            if session is None:
+                return resume_not_found(resume_id)
+            resume_skills = set(clean_and_split_skills(session.skills))
+            if experience is None:
+                experience = session.experience
+        elif resume_file is not None:
+            # Read bytes from the uploaded file and extract text in memory
+            try:
+                file_bytes = await read_upload(resume_file)
+                content = await run_stage("parse", extract_document_text, file_bytes, resume_file.filename)
+            except DocumentError as e:
+                return JSONResponse(status_code=400, content={"error": str(e)})
+
+            # Defensive check if content is empty after extraction
+            if not content.strip():
+                return JSONResponse(status_code=400, content={"error": "Failed to extract text from resume"})
+
+            resume_skills = set(clean_and_split_skills(await extract_skills_from_resume(content)))
         else:
-            return JSONResponse(status_code=400, content={"error": "Unsupported file format"})
+            return JSONResponse(status_code=400, content={"error": "Provide resume_file or resume_id"})
 
-        # Defensive check if content is empty after extraction
-        if not content.strip():
-            return JSONResponse(status_code=400, content={"error": "Failed to extract text from resume"})
-
-        # Process skills
-        resume_skills = set(clean_and_split_skills(extract_skills_from_resume(content)))
-        job_skills = set(clean_and_split_skills(extract_skills_from_resume(job_text))) if job_text else set()
+        experience = experience or 0
+        job_skills = set(clean_and_split_skills(await extract_skills_from_resume(job_text, compact=False))) if job_text else set()
 
         matched = sorted(resume_skills & job_skills)
         missing = sorted(job_skills - resume_skills)
         total = len(job_skills)
         score = int((len(matched) / total) * 100) if total else 0
 
-        exp_pattern = r"(\d+)[\s\-+]*(?:\d+)?\s*(?:years|yrs).+?(?:experience|work)"
-        matches = re.findall(exp_pattern, job_text.lower())
-        job_required_exp = max([int(m) for m in matches], default=0)
-
-        tool_exp_pattern = r"(\d+)[\s\-+]*(?:\d+)?\s*(?:years|yrs).+?with\s+([a-zA-Z\.\+#]+)"
-        tool_experience = {
-            tool.lower(): int(years)
-            for years, tool in re.findall(tool_exp_pattern, job_text.lower())
-            if years.isdigit()
-        }
+        job_required_exp, tool_experience = parse_job_experience(job_text)
 
         return {
             "score": score,
@@ -217,13 +288,72 @@ async def compare_job(
             "tool_experience": tool_experience
         }
 
+    except PoolSaturatedError:
+        raise
     except Exception as e:
         logging.error(f"Error processing /compare-job: {e}", exc_info=True)
         return JSONResponse(status_code=500, content={"error": "Internal Server Error"})
 
 
+class JobPosting(BaseModel):
+    title: str
+    text: str
+    company: str = ""
+    id: Optional[str] = None
+    skills: Optional[list[str]] = None
+
+
+class JobPostingsRequest(BaseModel):
+    postings: list[JobPosting]
+
+
+class JobRankRequest(BaseModel):
+    skills: Optional[list[str]] = None
+    resume_id: Optional[str] = None
+    resume_text: Optional[str] = None
+    experience: Optional[int] = None
+    top_k: int = 10
+    require_experience: bool = False
+
+
+@router.post("/job-postings")
+async def add_job_postings(data: JobPostingsRequest):
+    index = get_job_index()
+    postings = [p.model_dump() for p in data.postings]
+    added = await run_stage("index", index.add_postings, postings, in_process=True)
+    return {"added": len(added), "ids": [p["id"] for p in added], "index": index.stats()}
+
+
+@router.post("/job-postings/rank")
+async def rank_job_postings(data: JobRankRequest):
+    if data.top_k < 1:
+        return JSONResponse(status_code=400, content={"error": "top_k must be at least 1"})
+    skills = list(data.skills or [])
+    experience = data.experience or 0
+    if data.resume_id:
+        session = resume_store.get(data.resume_id)
+        if session is None:
+            return resume_not_found(data.resume_id)
+        skills += session.skills
+        if data.experience is None:
+            experience = session.experience
+    elif data.resume_text:
+        skills += get_skill_matcher().find(data.resume_text)
+        if data.experience is None:
+            experience = extract_experience_from_text(data.resume_text)
+    if not skills:
+        return JSONResponse(status_code=400, content={"error": "Provide skills or resume_text"})
+
+    index = get_job_index()
+    matches = await run_stage(
+        "rank", index.rank, skills, experience, data.top_k, data.require_experience, in_process=True
+    )
+    return {"experience": experience, "matches": matches}
+
+
 class DocGenRequest(BaseModel):
-    resume_text: str
+    resume_text: str = ""
+    resume_id: Optional[str] = None
     job_text: str
     full_name: str
     location: str
@@ -236,11 +366,15 @@ class DocGenRequest(BaseModel):
     company_address: str = ""
 
 
-@router.post("/generate-docs")
-async def generate_docs(data: DocGenRequest):
+DOC_FIELDS = ("cover_letter", "linkedin_message")
+
+
+def build_docs_prompt(data: DocGenRequest, resume_text: str) -> str:
     today = datetime.today().strftime("%d %B %Y")
+    # Contact details come from the request fields, so the resume copy can drop them
+    resume_text = compact_resume_text(resume_text, "docs")
 
-    prompt = f"""
+    return f"""
 You are an AI job application assistant. Your task is to:
 1. Extract key highlights from the resume, such as project impact, quantifiable results, tools used, certifications, and domain expertise.
 2. Use those highlights to create a professional, ATS-friendly cover letter that aligns with the job description and the company's goals.
@@ -252,7 +386,7 @@ Here’s the input context you should use:
 
 ---
 **Resume Summary**:
-{data.resume_text}
+{resume_text}
 
 **Job Description**:
 {data.job_text}
@@ -278,27 +412,139 @@ Respond ONLY in the following raw JSON format:
 }}
 ```
 """
+
+
+def resolve_docs_resume_text(data: DocGenRequest):
+    # Returns (resume_text, error_response)
+    resume_text = data.resume_text
+    if data.resume_id:
+        session = resume_store.get(data.resume_id)
+        if session is None:
+            return None, resume_not_found(data.resume_id)
+        resume_text = session.text
+    if not resume_text:
+        return None, JSONResponse(status_code=400, content={"error": "Provide resume_text or resume_id"})
+    return resume_text, None
+
+
+async def generate_documents(data: DocGenRequest, resume_text: str):
+    raw = await generate_text(build_docs_prompt(data, resume_text))
+    json_block = raw[raw.find("{"):raw.rfind("}") + 1]
+    parsed = json.loads(json_block)
+
+    return {
+        "cover_letter": parsed.get("cover_letter", "").strip(),
+        "linkedin_message": parsed.get("linkedin_message", "").strip()
+    }
+
+
+@router.post("/generate-docs")
+async def generate_docs(data: DocGenRequest):
+    resume_text, error = resolve_docs_resume_text(data)
+    if error is not None:
+        return error
+
     try:
+        return await generate_documents(data, resume_text)
+
+    except Exception as e:
+        logging.error(f"🔥 ERROR in /generate-docs: {e}")
+        return JSONResponse(status_code=500, content={"error": f"Internal Server Error: {str(e)}"})
+
+
+@router.post("/generate-docs/stream")
+async def generate_docs_stream(data: DocGenRequest, request: Request):
+    resume_text, error = resolve_docs_resume_text(data)
+    if error is not None:
+        return error
+    prompt = build_docs_prompt(data, resume_text)
+
+    async def events():
+        parser = JSONFieldStreamParser(DOC_FIELDS)
         try:
-            model = genai.GenerativeModel("gemini-1.5-pro")
-            response = model.generate_content(prompt)
+            async with contextlib.aclosing(stream_text(prompt)) as stream:
+                async for chunk in stream:
+                    if await request.is_disconnected():
+                        break
+                    yield sse_event("token", {"text": chunk})
+                    # Each document is sent as soon as its JSON string value is complete
+                    for name, value in parser.feed(chunk):
+                        yield sse_event("field", {"name": name, "value": value.strip()})
+            yield sse_event("done", {"missing": parser.pending})
         except Exception as e:
-            if "quota" in str(e).lower() or "429" in str(e):
-                print("⚠️ Gemini Pro quota exceeded, switching to flash...")
-                model = genai.GenerativeModel("gemini-1.5-flash")
-                response = model.generate_content(prompt)
-            else:
-                raise
+            logging.error(f"🔥 ERROR in /generate-docs/stream: {e}")
+            yield sse_event("error", {"error": str(e)})
 
-        raw = response.text.strip()
-        json_block = raw[raw.find("{"):raw.rfind("}") + 1]
-        parsed = json.loads(json_block)
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
 
-        return {
-            "cover_letter": parsed.get("cover_letter", "").strip(),
-            "linkedin_message": parsed.get("linkedin_message", "").strip()
-        }
 
-    except Exception as e:
-        print("🔥 ERROR in /generate-docs:", str(e))
-        return JSONResponse(status_code=500, content={"error": f"Internal Server Error: {str(e)}"})
+# Submit/poll variants: the request is queued and answered with a task id straight away
+
+async def run_resume_task(payload, data):
+    return await analyze_resume(data, payload["filename"])
+
+
+async def run_docs_task(payload, data):
+    return await generate_documents(DocGenRequest(**payload["request"]), payload["resume_text"])
+
+
+# A finished upload's resume_id lives in one process's resume_store and expires; never hand it out again
+task_queue.register("upload-resume", run_resume_task, reuse_finished=False)
+task_queue.register("generate-docs", run_docs_task)
+
+
+async def submit_task(kind, payload, data, priority, webhook_url):
+    # webhook_url is checked (and resolved) inside submit, so a bad one never takes a queue slot
+    try:
+        task, deduplicated = await asyncio.to_thread(task_queue.submit, kind, payload, data, priority, webhook_url)
+    except InvalidWebhookError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    return task_accepted(task, deduplicated)
+
+
+def task_accepted(task, deduplicated):
+    return JSONResponse(
+        status_code=202,
+        content={**task, "deduplicated": deduplicated},
+        headers={"Location": f"/tasks/{task['id']}"},
+    )
+
+
+class DocGenTaskRequest(DocGenRequest):
+    priority: int = 0
+    webhook_url: Optional[str] = None
+
+
+@router.post("/tasks/upload-resume")
+async def submit_resume_task(
+    file: UploadFile = File(...),
+    priority: int = Form(0),
+    webhook_url: Optional[str] = Form(None),
+):
+    try:
+        file_bytes = await read_upload(file)
+        # Reject what the parser would reject before it takes a queue slot
+        detect_format(file_bytes, file.filename)
+    except DocumentError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    return await submit_task("upload-resume", {"filename": file.filename}, file_bytes, priority, webhook_url)
+
+
+@router.post("/tasks/generate-docs")
+async def submit_docs_task(data: DocGenTaskRequest):
+    # resume_id is resolved now; the session may have expired by the time a worker gets to it
+    resume_text, error = resolve_docs_resume_text(data)
+    if error is not None:
+        return error
+    request = data.model_dump(exclude={"priority", "webhook_url", "resume_id", "resume_text"})
+    return await submit_task(
+        "generate-docs", {"request": request, "resume_text": resume_text}, None, data.priority, data.webhook_url
+    )
+
+
+@router.get("/tasks/{task_id}")
+async def get_task(task_id: str):
+    task = await asyncio.to_thread(task_queue.get, task_id)
+    if task is None:
+        return JSONResponse(status_code=404, content={"error": f"Unknown or expired task: {task_id}"})
+    return task
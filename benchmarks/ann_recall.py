@@ -0,0 +1,126 @@
+"""recall@k and latency of the IVF career index against exact search.
+
+Uses a synthetic clustered taxonomy so it runs without the embedding model,
+or a real careers file (embedded with the configured encoder) via --careers:
+
+    python -m benchmarks.ann_recall --size 100000 --nprobe 1 2 4 8 16 32
+    python -m benchmarks.ann_recall --careers data/occupations.json
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import numpy as np
+
+from core.ann_index import SENIORITY_YEARS, IVFIndex
+from benchmarks.micro import percentile
+
+
+def synthetic_careers(size, dim, clusters, spread=1.0, seed=0):
+    # Roles cluster around occupational families, like real taxonomies do
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centres[rng.integers(0, clusters, size)] + spread * rng.standard_normal((size, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    levels = list(SENIORITY_YEARS.values())
+    bounds = np.array([levels[i] for i in rng.integers(0, len(levels), size)], dtype=object)
+    min_years = np.array([low for low, _ in bounds], dtype=np.float32)
+    max_years = np.array([np.inf if high is None else high for _, high in bounds], dtype=np.float32)
+    return vectors, min_years, max_years
+
+
+def make_queries(vectors, count, noise=0.8, seed=1):
+    # A user's skill vector lands near, but not on, the roles that fit them
+    rng = np.random.default_rng(seed)
+    queries = vectors[rng.integers(0, len(vectors), count)]
+    queries = queries + noise * rng.standard_normal(queries.shape).astype(np.float32) / np.sqrt(vectors.shape[1])
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+def recall_at_k(index, queries, k, nprobe, experiences):
+    hits = 0
+    latencies = []
+    for query, experience in zip(queries, experiences):
+        exact = {i for i, _ in index.exact_search(query, k, experience)}
+        started = time.perf_counter()
+        approx = index.search(query, k, nprobe=nprobe, experience=experience)
+        latencies.append((time.perf_counter() - started) * 1000)
+        hits += len(exact & {i for i, _ in approx}) / max(1, len(exact))
+    latencies.sort()
+    return {
+        "nprobe": nprobe,
+        "recall": round(hits / len(queries), 4),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+    }
+
+
+def exact_latency(index, queries, k, experiences):
+    latencies = []
+    for query, experience in zip(queries, experiences):
+        started = time.perf_counter()
+        index.exact_search(query, k, experience)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    return {"p50_ms": round(percentile(latencies, 50), 3), "p95_ms": round(percentile(latencies, 95), 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=2000)
+    parser.add_argument("--spread", type=float, default=1.3, help="within-cluster spread relative to centres")
+    parser.add_argument("--noise", type=float, default=0.8, help="query distance from its source role")
+    parser.add_argument("--nlist", type=int, default=None)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--careers", default=None, help="careers JSON to index instead of synthetic data")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.careers:
+        from core.career_index import build_career_index
+        built = build_career_index(args.careers, mode="ivf", nlist=args.nlist).ann
+        vectors = np.asarray(built.vectors)
+    else:
+        vectors, min_years, max_years = synthetic_careers(args.size, args.dim, args.clusters, args.spread)
+        built = IVFIndex.build(vectors, min_years, max_years, nlist=args.nlist)
+    build_seconds = time.perf_counter() - started
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "careers.ivf")
+        built.save(path, {"key": "bench"})
+        started = time.perf_counter()
+        index = IVFIndex.load(path, "bench")
+        load_ms = (time.perf_counter() - started) * 1000
+
+        queries = make_queries(vectors, args.queries, args.noise)
+        experiences = np.random.default_rng(2).integers(0, 12, len(queries)).astype(float)
+        report = {
+            "size": len(index), "dim": vectors.shape[1], "nlist": index.nlist, "k": args.k,
+            "build_seconds": round(build_seconds, 2), "mmap_load_ms": round(load_ms, 2),
+            "exact": exact_latency(index, queries, args.k, [None] * len(queries)),
+            "exact_filtered": exact_latency(index, queries, args.k, experiences),
+            "ivf": [recall_at_k(index, queries, args.k, n, [None] * len(queries)) for n in args.nprobe],
+            "ivf_filtered": [recall_at_k(index, queries, args.k, n, experiences) for n in args.nprobe],
+        }
+
+    print(f"size={report['size']} nlist={report['nlist']} build={report['build_seconds']}s "
+          f"mmap load={report['mmap_load_ms']}ms")
+    print(f"exact            p50={report['exact']['p50_ms']}ms p95={report['exact']['p95_ms']}ms")
+    for label in ("ivf", "ivf_filtered"):
+        for row in report[label]:
+            print(f"{label:<13} nprobe={row['nprobe']:<3} recall@{args.k}={row['recall']:<7} "
+                  f"p50={row['p50_ms']}ms p95={row['p95_ms']}ms")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Compare the single-pass resume parser against the old per-line regex parser.
+
+    python -m benchmarks.bench_resume_parser --repeat 200
+"""
+import argparse
+import json
+import re
+from datetime import datetime
+from dateutil import parser as date_parser
+
+from core.resume_parser import parse_resume
+from benchmarks.micro import SAMPLE_PATHS, load_sample_texts, measure
+
+
+def legacy_extract_sections(text):
+    sections = {"general": []}
+    current_section = "general"
+    for line in text.split("\n"):
+        line_clean = line.strip().lower()
+        if re.match(r"^(work\s+)?experience$|^professional experience$|^employment$", line_clean):
+            current_section = "experience"
+        elif re.match(r"^education$|^academic background$", line_clean):
+            current_section = "education"
+        elif re.match(r"^projects$|^personal projects$", line_clean):
+            current_section = "projects"
+        elif re.match(r"^certifications?$|^courses?$", line_clean):
+            current_section = "certifications"
+        elif re.match(r"^((technical|core|key)\s+)?skills(\s*(&|and)\s*\w+)?:?$", line_clean):
+            current_section = "skills"
+        sections.setdefault(current_section, []).append(line)
+    return sections
+
+
+def legacy_experience(text):
+    # Summed every range as written, so overlapping jobs were counted twice
+    experience_text = "\n".join(legacy_extract_sections(text).get("experience", []))
+    total_months = 0
+    for start, end in re.findall(r"([A-Z][a-z]+\s+\d{4})\s*[–—\-]\s*(Present|[A-Z][a-z]+\s+\d{4})", experience_text):
+        try:
+            start_date = date_parser.parse(start)
+            end_date = datetime.now() if "present" in end.lower() else date_parser.parse(end)
+        except Exception:
+            continue
+        months = (end_date.year - start_date.year) * 12 + (end_date.month - start_date.month)
+        if months > 0:
+            total_months += months
+    return round(total_months / 12)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    texts = load_sample_texts()
+    mismatched = [path for path, text in zip(SAMPLE_PATHS, texts)
+                  if parse_resume(text).sections != legacy_extract_sections(text)]
+    report = {
+        "resumes": len(texts),
+        "section_mismatches": mismatched,
+        "experience": [
+            {"path": path, "legacy": legacy_experience(text), "merged": parse_resume(text).experience}
+            for path, text in zip(SAMPLE_PATHS, texts)
+        ],
+        "legacy": measure(lambda t: (legacy_extract_sections(t), legacy_experience(t)), texts, args.repeat),
+        "single_pass": measure(lambda t: parse_resume(t).experience, texts, args.repeat),
+    }
+
+    print(f"{report['resumes']} resumes, section mismatches: {len(mismatched)}")
+    for row in report["experience"]:
+        if row["legacy"] != row["merged"]:
+            print(f"  {row['path']}: {row['legacy']} -> {row['merged']} years after merging overlaps")
+    for label in ("legacy", "single_pass"):
+        stats = report[label]
+        print(f"{label:<12} mean={stats['mean_ms']}ms p50={stats['p50_ms']}ms p95={stats['p95_ms']}ms")
+    print(f"speedup: {report['legacy']['mean_ms'] / report['single_pass']['mean_ms']:.1f}x")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Compare the compiled SkillMatcher against the old per-skill substring loop.
+
+    python -m benchmarks.bench_skill_matcher --skills 20000
+"""
+import argparse
+import glob
+import random
+import string
+import time
+
+from core.skills_db import load_skill_taxonomy
+from core.skill_matcher import SkillMatcher
+
+
+def load_resume_texts():
+    try:
+        from pdfminer.high_level import extract_text
+    except ImportError:
+        return []
+    texts = []
+    for path in sorted(glob.glob("resume_samples/*.pdf")) + ["data/resume.pdf"]:
+        try:
+            texts.append(extract_text(path))
+        except Exception as e:
+            print(f"skipping {path}: {e}")
+    return texts
+
+
+def synthetic_taxonomy(size, seed=7):
+    rng = random.Random(seed)
+    taxonomy = load_skill_taxonomy()
+    while len(taxonomy) < size:
+        words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9))) for _ in range(rng.randint(1, 3))]
+        taxonomy.setdefault(" ".join(words), [])
+    return taxonomy
+
+
+def linear_scan(skills, text):
+    text_lower = text.lower()
+    return [skill for skill in skills if skill in text_lower]
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--skills", type=int, nargs="+", default=[42, 1000, 10000, 50000])
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    texts = load_resume_texts()
+    if not texts:
+        print("pdfminer unavailable, using synthetic resume text")
+        texts = [" ".join(load_skill_taxonomy()) * 20]
+    total_chars = sum(len(t) for t in texts)
+    print(f"{len(texts)} documents, {total_chars} characters")
+
+    for size in args.skills:
+        taxonomy = synthetic_taxonomy(size)
+        skills = list(taxonomy)
+
+        start = time.perf_counter()
+        matcher = SkillMatcher(taxonomy)
+        build = time.perf_counter() - start
+
+        loop = best_of(lambda: [linear_scan(skills, t) for t in texts], args.repeat)
+        compiled = best_of(lambda: [matcher.find(t) for t in texts], args.repeat)
+        print(
+            f"skills={size:>6}  build={build * 1000:8.1f}ms  "
+            f"loop={loop * 1000:8.2f}ms  matcher={compiled * 1000:8.2f}ms  "
+            f"speedup={loop / compiled:6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Compare two benchmark result files: python -m benchmarks.compare BASE.json NEW.json"""
+import sys
+import json
+
+
+def _delta(old, new):
+    if not old:
+        return "n/a"
+    return f"{(new - old) / old * 100:+.1f}%"
+
+
+def main(base_path, new_path):
+    with open(base_path) as f:
+        base = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"base {base.get('commit')} ({base.get('timestamp')})  vs  new {new.get('commit')} ({new.get('timestamp')})")
+
+    for name, stats in new.get("micro", {}).items():
+        old = base.get("micro", {}).get(name)
+        if old:
+            print(f"micro {name:<30} p50 {old['p50_ms']:>9} -> {stats['p50_ms']:>9}ms ({_delta(old['p50_ms'], stats['p50_ms'])})")
+
+    for endpoint, levels in new.get("load", {}).items():
+        old_levels = {lvl["concurrency"]: lvl for lvl in base.get("load", {}).get(endpoint, [])}
+        for level in levels:
+            old = old_levels.get(level["concurrency"])
+            if not old:
+                continue
+            print(
+                f"load  {endpoint:<20} c={level['concurrency']:<3} "
+                f"p95 {old['p95_ms']:>8} -> {level['p95_ms']:>8}ms ({_delta(old['p95_ms'], level['p95_ms'])})  "
+                f"rps {old['throughput_rps']:>8} -> {level['throughput_rps']:>8} ({_delta(old['throughput_rps'], level['throughput_rps'])})"
+            )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit(__doc__)
+    main(sys.argv[1], sys.argv[2])
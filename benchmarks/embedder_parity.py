@@ -0,0 +1,110 @@
+"""Ranking parity and cost of the ONNX int8 embedder against the torch backend.
+
+    python -m core.onnx_embedder export models/all-MiniLM-L6-v2-int8
+    python -m benchmarks.embedder_parity --min-top1 0.95
+
+Exits non-zero when career top-1 agreement falls below --min-top1.
+"""
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+import numpy as np
+
+from core.embedder import load_model
+from core.skills_db import load_skill_taxonomy
+from core.skill_matcher import get_skill_matcher
+from benchmarks.micro import load_sample_texts
+
+
+def pooled(model, skill_sets):
+    # Same pooling as core.embedder: mean of normalized per-skill vectors, renormalized
+    vocab = sorted({s for skills in skill_sets for s in skills})
+    vectors = dict(zip(vocab, model.encode(vocab, convert_to_numpy=True, normalize_embeddings=True)))
+    out = []
+    for skills in skill_sets:
+        v = np.mean([vectors[s] for s in skills], axis=0) if skills else np.zeros(model.get_sentence_embedding_dimension())
+        n = np.linalg.norm(v)
+        out.append(v / n if n else v)
+    return np.stack(out).astype(np.float32)
+
+
+def rank_agreement(scores_a, scores_b, k):
+    top1 = np.mean(scores_a.argmax(axis=1) == scores_b.argmax(axis=1))
+    k = min(k, scores_a.shape[1])
+    top_a = np.argsort(-scores_a, axis=1)[:, :k]
+    top_b = np.argsort(-scores_b, axis=1)[:, :k]
+    overlap = np.mean([len(set(a) & set(b)) / k for a, b in zip(top_a, top_b)])
+    return float(top1), float(overlap)
+
+
+def measure_backend(backend):
+    # Run in a fresh process so max RSS reflects one backend only
+    started = time.perf_counter()
+    model = load_model(backend)
+    load_seconds = time.perf_counter() - started
+    skills = list(load_skill_taxonomy())
+    model.encode(skills[:8])
+    started = time.perf_counter()
+    for _ in range(5):
+        model.encode(skills, convert_to_numpy=True, normalize_embeddings=True)
+    encode_ms = (time.perf_counter() - started) / 5 * 1000
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {"load_seconds": round(load_seconds, 3), "encode_vocab_ms": round(encode_ms, 2), "max_rss_mb": round(rss_mb, 1)}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--careers", default="data/career_paths.json")
+    ap.add_argument("--k", type=int, default=5)
+    ap.add_argument("--min-top1", type=float, default=0.95)
+    ap.add_argument("--measure", choices=["torch", "onnx"], help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure_backend(args.measure)))
+        return
+
+    with open(args.careers) as f:
+        careers = json.load(f)
+    matcher = get_skill_matcher()
+    career_sets = [[matcher.canonicalize(s) for s in c.get("required_skills", [])] for c in careers]
+    resume_sets = [matcher.find(text) for text in load_sample_texts()]
+    vocab = list(load_skill_taxonomy())
+
+    torch_model, onnx_model = load_model("torch"), load_model("onnx")
+
+    skill_cos = np.sum(
+        torch_model.encode(vocab, normalize_embeddings=True) * onnx_model.encode(vocab, normalize_embeddings=True), axis=1
+    )
+    career_scores = {}
+    for name, model in (("torch", torch_model), ("onnx", onnx_model)):
+        career_scores[name] = pooled(model, resume_sets) @ pooled(model, career_sets).T
+    top1, overlap = rank_agreement(career_scores["torch"], career_scores["onnx"], args.k)
+
+    # Skill-to-skill neighbourhoods exercise many more rankings than the career file alone
+    t = torch_model.encode(vocab, normalize_embeddings=True)
+    o = onnx_model.encode(vocab, normalize_embeddings=True)
+    nn_top1, nn_overlap = rank_agreement(t @ t.T - 2 * np.eye(len(vocab)), o @ o.T - 2 * np.eye(len(vocab)), args.k)
+
+    report = {
+        "skill_cosine_mean": round(float(skill_cos.mean()), 5),
+        "skill_cosine_min": round(float(skill_cos.min()), 5),
+        "career_top1_agreement": round(top1, 4),
+        f"career_top{args.k}_overlap": round(overlap, 4),
+        "skill_nn_top1_agreement": round(nn_top1, 4),
+        f"skill_nn_top{args.k}_overlap": round(nn_overlap, 4),
+    }
+    for backend in ("torch", "onnx"):
+        out = subprocess.check_output([sys.executable, "-m", "benchmarks.embedder_parity", "--measure", backend], text=True)
+        report[backend] = json.loads(out.strip().splitlines()[-1])
+    print(json.dumps(report, indent=2))
+
+    if top1 < args.min_top1:
+        sys.exit(f"career top-1 agreement {top1:.3f} is below {args.min_top1}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Deterministic stand-ins for Gemini and SerpAPI with configurable latency."""
+import json
+import asyncio
+import hashlib
+import httpx
+
+from core.llm_gateway import FakeBackend
+from core.skill_matcher import get_skill_matcher
+
+
+def _seed(text):
+    return int(hashlib.sha256(text.encode()).hexdigest()[:8], 16)
+
+
+def fake_llm_response(prompt, model_name):
+    # Shapes the answer after the prompt so every endpoint parses it like a real reply
+    if "cover_letter" in prompt:
+        return json.dumps({
+            "cover_letter": "Dear Hiring Manager,\n" + "I am excited to apply. " * 40,
+            "linkedin_message": "Hi, I'd appreciate a quick chat or a referral. Thank you!",
+        })
+    if "career paths" in prompt:
+        skills = prompt.split("Based on the following skills:")[1].split("And estimated")[0].strip()
+        return json.dumps([
+            {"career": f"Role {i}", "required_skills": skills.split(", ")[:5], "courses": []}
+            for i in range(3)
+        ])
+    if "=== RESUME 1 ===" in prompt:
+        resumes = prompt.split("=== RESUME ")[1:]
+        return json.dumps({
+            resume.split(" ===", 1)[0]: ", ".join(get_skill_matcher().find(resume.split(" ===", 1)[1]))
+            for resume in resumes
+        })
+    if "Extract all relevant technical and soft skills" in prompt:
+        return ", ".join(get_skill_matcher().find(prompt.split("Resume:", 1)[-1]))
+    return f"Answer {_seed(prompt) % 1000}: " + "keep learning. " * 20
+
+
+def make_fake_llm(latency=0.0):
+    return FakeBackend(responder=fake_llm_response, latency=latency)
+
+
+def make_fake_serpapi(latency=0.0):
+    async def handler(request):
+        if latency:
+            await asyncio.sleep(latency)
+        query = request.url.params.get("q", "")
+        base = 60000 + _seed(query) % 90000
+        jobs = [
+            {"title": query.split(" in ")[0], "company_name": f"Company {i}", "salary": f"${base + i * 5000:,} a year"}
+            for i in range(5)
+        ]
+        return httpx.Response(200, json={"jobs_results": jobs})
+
+    return httpx.MockTransport(handler)
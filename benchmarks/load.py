@@ -0,0 +1,94 @@
+"""In-process load generator: drives the FastAPI app through httpx's ASGI transport."""
+import time
+import asyncio
+import itertools
+import httpx
+
+from benchmarks.micro import percentile
+
+DOC_FIELDS = {
+    "job_text": "We need 3+ years of experience with Python, SQL and Tableau.",
+    "full_name": "Sam Doe", "location": "Austin, TX", "phone": "555-0100", "email": "sam@example.com",
+    "degree": "MS Computer Science", "university": "State University",
+    "job_title": "Data Scientist", "company_name": "Acme",
+}
+
+
+def endpoint_requests(samples):
+    """Map endpoint name -> factory producing the kwargs for client.request()."""
+    pdfs = itertools.cycle(samples)
+    titles = itertools.cycle(["Data Scientist", "Data Engineer", "Frontend Developer", "ML Engineer"])
+
+    def upload():
+        name, data = next(pdfs)
+        return {"method": "POST", "url": "/upload-resume", "files": {"file": (name, data, "application/pdf")}}
+
+    def compare():
+        name, data = next(pdfs)
+        return {
+            "method": "POST", "url": "/compare-job",
+            "files": {"resume_file": (name, data, "application/pdf")},
+            "data": {"job_text": DOC_FIELDS["job_text"]},
+        }
+
+    return {
+        "/upload-resume": upload,
+        "/compare-job": compare,
+        "/extract-skills": lambda: {"method": "POST", "url": "/extract-skills", "data": {"text": "python sql pandas tableau aws"}},
+        "/recommend-careers": lambda: {"method": "POST", "url": "/recommend-careers", "data": {"skills": "python, sql, pandas", "experience": "2"}},
+        "/salary": lambda: {"method": "GET", "url": "/salary", "params": {"job_title": next(titles)}},
+        "/missing-skills": lambda: {"method": "POST", "url": "/missing-skills", "json": {"resume_skills": ["python"], "job_skills": ["python", "sql"]}},
+        "/chatbot": lambda: {"method": "POST", "url": "/chatbot", "json": {"message": "How do I become a data engineer?"}},
+        "/generate-docs": lambda: {"method": "POST", "url": "/generate-docs", "json": {**DOC_FIELDS, "resume_text": "Python developer"}},
+    }
+
+
+async def run_level(app, make_request, concurrency, total):
+    latencies = []
+    errors = 0
+    queue = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(make_request())
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=120) as client:
+        async def worker():
+            nonlocal errors
+            while not queue.empty():
+                kwargs = queue.get_nowait()
+                start = time.perf_counter()
+                response = await client.request(**kwargs)
+                latencies.append((time.perf_counter() - start) * 1000)
+                errors += response.status_code >= 400
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": round(total / wall, 2) if wall else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+async def run_load(app, samples, endpoints, concurrency_levels, requests_per_level, reset=None):
+    factories = endpoint_requests(samples)
+    results = {}
+    for endpoint in endpoints:
+        results[endpoint] = []
+        for concurrency in concurrency_levels:
+            if reset is not None:
+                reset()
+            level = await run_level(app, factories[endpoint], concurrency, max(requests_per_level, concurrency))
+            results[endpoint].append(level)
+            print(
+                f"{endpoint:<20} c={concurrency:<3} rps={level['throughput_rps']:>8}  "
+                f"p50={level['p50_ms']:>8}ms  p95={level['p95_ms']:>8}ms  p99={level['p99_ms']:>8}ms  "
+                f"errors={level['errors']}"
+            )
+    return results
@@ -0,0 +1,61 @@
+"""Micro-benchmarks for the CPU-side resume pipeline."""
+import glob
+import time
+import statistics
+
+from core.recommender import extract_experience_from_text, extract_sections, match_careers
+from core.skill_matcher import get_skill_matcher
+from core.skills_db import skills_db
+from benchmarks.bench_skill_matcher import linear_scan
+
+SAMPLE_PATHS = sorted(glob.glob("resume_samples/*.pdf")) + ["data/resume.pdf"]
+
+
+def load_sample_texts(paths=SAMPLE_PATHS):
+    from core.document_extractor import extract_document_text
+
+    texts = []
+    for path in paths:
+        with open(path, "rb") as f:
+            texts.append(extract_document_text(f.read(), path))
+    return texts
+
+
+def measure(fn, inputs, repeat):
+    # Per-call latency over every input, repeated; returns summary stats in milliseconds
+    samples = []
+    for _ in range(repeat):
+        for item in inputs:
+            start = time.perf_counter()
+            fn(item)
+            samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "calls": len(samples),
+        "mean_ms": round(statistics.fmean(samples), 4),
+        "p50_ms": round(percentile(samples, 50), 4),
+        "p95_ms": round(percentile(samples, 95), 4),
+        "p99_ms": round(percentile(samples, 99), 4),
+    }
+
+
+def percentile(sorted_samples, pct):
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, max(0, round(pct / 100 * len(sorted_samples)) - 1))
+    return sorted_samples[index]
+
+
+def run_micro(repeat=20, texts=None):
+    texts = texts or load_sample_texts()
+    matcher = get_skill_matcher()
+    skill_sets = [matcher.find(text) for text in texts]
+    match_careers(skill_sets[0])  # builds the career index outside the timed region
+
+    return {
+        "extract_sections": measure(extract_sections, texts, repeat),
+        "extract_experience_from_text": measure(extract_experience_from_text, texts, repeat),
+        "skills_db_linear_scan": measure(lambda text: linear_scan(skills_db, text), texts, repeat),
+        "skill_matcher": measure(matcher.find, texts, repeat),
+        "match_careers": measure(match_careers, skill_sets, repeat),
+    }
@@ -0,0 +1,102 @@
+"""Offline benchmark suite: endpoint load at several concurrency levels plus micro-benchmarks.
+
+    python -m benchmarks.run --llm-latency 0.8 --serp-latency 0.3 --concurrency 1 4 16
+    python -m benchmarks.compare benchmarks/results/a.json benchmarks/results/b.json
+
+Gemini and SerpAPI are replaced by deterministic fakes, so no keys or network are needed.
+"""
+import os
+
+# Must be set before the app modules read their configuration
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("LLM_CACHE_PATH", "")
+os.environ.setdefault("WARMUP_ON_STARTUP", "0")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import json
+import time
+import asyncio
+import argparse
+import platform
+import subprocess
+
+from benchmarks.fakes import make_fake_llm, make_fake_serpapi
+from benchmarks.load import endpoint_requests, run_load
+from benchmarks.micro import SAMPLE_PATHS, load_sample_texts, run_micro
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def reset_caches():
+    # Every concurrency level starts cold so levels are comparable
+    from core.llm_cache import llm_cache
+    from core.salary_fetcher import salary_service
+    from core.semantic_cache import career_path_cache
+
+    llm_cache.clear_memory()
+    salary_service.clear()
+    career_path_cache.clear()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--llm-latency", type=float, default=0.5, help="seconds per fake Gemini call")
+    ap.add_argument("--serp-latency", type=float, default=0.2, help="seconds per fake SerpAPI call")
+    ap.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    ap.add_argument("--requests", type=int, default=32, help="requests per endpoint and level")
+    ap.add_argument("--endpoints", nargs="+", default=None)
+    ap.add_argument("--micro-repeat", type=int, default=20)
+    ap.add_argument("--skip-load", action="store_true")
+    ap.add_argument("--skip-micro", action="store_true")
+    ap.add_argument("--output", default=None)
+    args = ap.parse_args()
+
+    from core.llm_gateway import set_backend
+    from core.salary_fetcher import salary_service
+    from core.warmup import warm_up
+    import main as app_module
+
+    set_backend(make_fake_llm(args.llm_latency))
+    salary_service.transport = make_fake_serpapi(args.serp_latency)
+    warm_up()
+
+    samples = []
+    for path in SAMPLE_PATHS:
+        with open(path, "rb") as f:
+            samples.append((os.path.basename(path), f.read()))
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "config": vars(args),
+    }
+
+    if not args.skip_micro:
+        print("== micro-benchmarks")
+        report["micro"] = run_micro(args.micro_repeat, load_sample_texts())
+        for name, stats in report["micro"].items():
+            print(f"{name:<30} p50={stats['p50_ms']:>9}ms  p95={stats['p95_ms']:>9}ms  p99={stats['p99_ms']:>9}ms")
+
+    if not args.skip_load:
+        print("== endpoint load")
+        endpoints = args.endpoints or list(endpoint_requests(samples))
+        report["load"] = asyncio.run(
+            run_load(app_module.app, samples, endpoints, args.concurrency, args.requests, reset=reset_caches)
+        )
+
+    output = args.output or os.path.join("benchmarks", "results", f"{time.strftime('%Y%m%d-%H%M%S')}-{report['commit']}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"saved {output}")
+
+
+if __name__ == "__main__":
+    main()
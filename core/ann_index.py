@@ -0,0 +1,183 @@
+import os
+import json
+import shutil
+import numpy as np
+
+CAREER_IVF_NPROBE = max(1, int(os.getenv("CAREER_IVF_NPROBE", "8")))
+# Careers within this many years of a role's bounds still count as a fit
+SENIORITY_TOLERANCE_YEARS = float(os.getenv("SENIORITY_TOLERANCE_YEARS", "1"))
+
+SENIORITY_YEARS = {
+    "intern": (0, 1),
+    "entry": (0, 2),
+    "junior": (0, 2),
+    "mid": (2, 6),
+    "senior": (5, None),
+    "staff": (8, None),
+    "lead": (7, None),
+    "principal": (10, None),
+}
+
+ARRAYS = ("centroids", "vectors", "ids", "offsets", "min_years", "max_years")
+
+
+def seniority_bounds(career):
+    # Explicit min_years/max_years win; otherwise map a "seniority" label; unknown means any level
+    low, high = SENIORITY_YEARS.get(str(career.get("seniority", "")).lower(), (0, None))
+    low = career.get("min_years", low)
+    high = career.get("max_years", high)
+    return float(low or 0), float("inf") if high is None else float(high)
+
+
+def seniority_arrays(careers):
+    bounds = np.array([seniority_bounds(career) for career in careers], dtype=np.float32).reshape(-1, 2)
+    return bounds[:, 0], bounds[:, 1]
+
+
+def experience_mask(min_years, max_years, experience, tolerance=SENIORITY_TOLERANCE_YEARS):
+    return (min_years <= experience + tolerance) & (max_years >= experience - tolerance)
+
+
+def spherical_kmeans(vectors, nlist, iterations=10, sample_size=50000, seed=0):
+    # k-means on the unit sphere: assignment by dot product, centroids renormalised each round
+    rng = np.random.default_rng(seed)
+    sample = vectors
+    if len(vectors) > sample_size:
+        sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+    centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+
+    for _ in range(iterations):
+        assignment = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, sample)
+        counts = np.bincount(assignment, minlength=nlist)
+        empty = counts == 0
+        # Re-seed empty lists so every list ends up carrying part of the data
+        sums[empty] = sample[rng.choice(len(sample), int(empty.sum()), replace=False)]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = (sums / np.maximum(norms, 1e-12)).astype(np.float32)
+    return centroids
+
+
+def default_nlist(n):
+    return max(1, min(n, int(4 * np.sqrt(n))))
+
+
+class IVFIndex:
+    """Inverted-file index over unit vectors; vectors are stored grouped by their nearest centroid."""
+
+    def __init__(self, centroids, vectors, ids, offsets, min_years, max_years, nprobe=CAREER_IVF_NPROBE):
+        self.centroids = centroids
+        self.vectors = vectors
+        self.ids = ids
+        self.offsets = offsets
+        self.min_years = min_years
+        self.max_years = max_years
+        self.nprobe = max(1, nprobe)
+
+    @classmethod
+    def build(cls, matrix, min_years=None, max_years=None, nlist=None, iterations=10, seed=0):
+        matrix = np.asarray(matrix, dtype=np.float32)
+        n = len(matrix)
+        if min_years is None:
+            min_years = np.zeros(n, dtype=np.float32)
+        if max_years is None:
+            max_years = np.full(n, np.inf, dtype=np.float32)
+
+        centroids = spherical_kmeans(matrix, nlist or default_nlist(n), iterations, seed=seed)
+        assignment = np.empty(n, dtype=np.int64)
+        for start in range(0, n, 8192):
+            assignment[start:start + 8192] = np.argmax(matrix[start:start + 8192] @ centroids.T, axis=1)
+
+        order = np.argsort(assignment, kind="stable")
+        counts = np.bincount(assignment, minlength=len(centroids))
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        return cls(
+            centroids, matrix[order], order.astype(np.int64), offsets,
+            np.asarray(min_years, dtype=np.float32)[order], np.asarray(max_years, dtype=np.float32)[order],
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def nlist(self):
+        return len(self.centroids)
+
+    def _probe(self, query, nprobe):
+        nprobe = min(nprobe, self.nlist)
+        scores = self.centroids @ query
+        lists = np.argpartition(-scores, nprobe - 1)[:nprobe] if nprobe < self.nlist else np.arange(self.nlist)
+        return [(self.offsets[i], self.offsets[i + 1]) for i in lists if self.offsets[i + 1] > self.offsets[i]]
+
+    def _score(self, query, ranges, k, experience):
+        if not ranges:
+            return []
+        rows = np.concatenate([np.arange(start, end) for start, end in ranges])
+        scores = self.vectors[rows] @ query
+        if experience is not None:
+            keep = experience_mask(self.min_years[rows], self.max_years[rows], experience)
+            rows, scores = rows[keep], scores[keep]
+        if not len(rows):
+            return []
+        k = min(k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(self.ids[rows[i]]), float(scores[i])) for i in top]
+
+    def search(self, query, k=3, nprobe=None, experience=None):
+        """Approximate top-k as (original id, score); widens the probe when filters leave too few hits."""
+        if not len(self):
+            return []
+        query = np.asarray(query, dtype=np.float32)
+        # At least one list, or the widening loop below would double 0 forever
+        nprobe = max(1, nprobe or self.nprobe)
+        if experience is not None:
+            # A filter that passes 1 in 4 roles needs ~4x the lists for the same recall
+            selectivity = float(experience_mask(self.min_years, self.max_years, experience).mean())
+            nprobe = min(self.nlist, int(np.ceil(nprobe / max(selectivity, 1 / self.nlist))))
+        while True:
+            results = self._score(query, self._probe(query, nprobe), k, experience)
+            if len(results) >= k or nprobe >= self.nlist:
+                return results
+            nprobe *= 2
+
+    def exact_search(self, query, k=3, experience=None):
+        if not len(self):
+            return []
+        return self._score(np.asarray(query, dtype=np.float32), [(0, len(self))], k, experience)
+
+    def save(self, path, meta):
+        # Written to a sibling directory and swapped in, so readers never see half an index
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        for name in ARRAYS:
+            np.save(os.path.join(tmp_path, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+            json.dump(meta, f)
+
+        old_path = f"{path}.{os.getpid()}.old"
+        if os.path.isdir(path):
+            os.replace(path, old_path)
+        os.replace(tmp_path, path)
+        shutil.rmtree(old_path, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path, key=None, nprobe=CAREER_IVF_NPROBE):
+        """Memory-maps a saved index; returns None if it is missing or was built from other data."""
+        try:
+            with open(os.path.join(path, "meta.json")) as f:
+                meta = json.load(f)
+            if key is not None and meta.get("key") != key:
+                return None
+            arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in ARRAYS}
+        except (OSError, ValueError):
+            return None
+        # Centroids and offsets are tiny and touched on every query; keep them in RAM
+        arrays["centroids"] = np.array(arrays["centroids"])
+        arrays["offsets"] = np.array(arrays["offsets"])
+        return cls(nprobe=nprobe, **arrays)
+
+    def stats(self):
+        return {"size": len(self), "nlist": self.nlist, "nprobe": self.nprobe}
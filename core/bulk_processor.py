@@ -0,0 +1,172 @@
+import os
+import json
+import shutil
+import asyncio
+import zipfile
+import tempfile
+
+from core.executor import PoolSaturatedError, run_stage, stage_pool
+from core.document_extractor import MAX_DOCUMENT_BYTES, DocumentError
+from core.recommender import extract_resume_from_bytes, extract_skills_with_llm, format_career_matches, match_careers_batch
+from core.skill_matcher import get_skill_matcher
+
+# Resumes are parsed and scored in chunks so memory stays flat for any batch size
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "16"))
+BULK_MAX_FILES = int(os.getenv("BULK_MAX_FILES", "1000"))
+# Spooled copies of uploads stay in memory up to this size, then move to a temp file
+BULK_SPOOL_MAX_MEMORY = int(os.getenv("BULK_SPOOL_MAX_MEMORY", str(1024 * 1024)))
+RESUME_EXTENSIONS = (".pdf", ".docx")
+
+
+def spool_uploads(uploads, max_memory=BULK_SPOOL_MAX_MEMORY):
+    """Copy uploads into files the caller owns; FastAPI closes form files as soon as the handler returns."""
+    spooled = []
+    for upload in uploads:
+        copy = tempfile.SpooledTemporaryFile(max_size=max_memory)
+        upload.file.seek(0)
+        shutil.copyfileobj(upload.file, copy)
+        copy.seek(0)
+        spooled.append((upload.filename, copy))
+    return spooled
+
+
+def iter_upload_documents(files, max_files=BULK_MAX_FILES, max_bytes=MAX_DOCUMENT_BYTES):
+    """Yield (filename, bytes) for each (filename, file) pair, expanding .zip archives member by member."""
+    count = 0
+    for filename, file in files:
+        name = filename or f"file-{count}"
+        if name.lower().endswith(".zip"):
+            file.seek(0)
+            with zipfile.ZipFile(file) as archive:
+                for info in archive.infolist():
+                    if info.is_dir() or not info.filename.lower().endswith(RESUME_EXTENSIONS):
+                        continue
+                    if count >= max_files:
+                        return
+                    count += 1
+                    if info.file_size > max_bytes:
+                        yield info.filename, DocumentError(f"File exceeds the {max_bytes} byte limit")
+                        continue
+                    yield info.filename, archive.read(info)
+        else:
+            if count >= max_files:
+                return
+            count += 1
+            file.seek(0)
+            data = file.read(max_bytes + 1)
+            if len(data) > max_bytes:
+                yield name, DocumentError(f"File exceeds the {max_bytes} byte limit")
+                continue
+            yield name, data
+
+
+async def aiter_documents(documents):
+    # Zip members are inflated and spooled files read in a worker thread, off the event loop
+    done = object()
+    while True:
+        item = await asyncio.to_thread(next, documents, done)
+        if item is done:
+            return
+        yield item
+
+
+async def _run_with_backoff(stage, fn, *args, in_process=False):
+    # Bulk work yields to interactive traffic: wait and retry instead of failing the item
+    while True:
+        try:
+            return await run_stage(stage, fn, *args, in_process=in_process)
+        except PoolSaturatedError as e:
+            await asyncio.sleep(e.retry_after)
+
+
+async def _parse(index, filename, data, parse_limit):
+    if isinstance(data, Exception):
+        return index, filename, data
+    async with parse_limit:
+        try:
+            return index, filename, await _run_with_backoff("parse", extract_resume_from_bytes, data, filename)
+        except Exception as e:
+            return index, filename, e
+
+
+async def _skills_for(text, use_llm):
+    if use_llm:
+        llm_result = await extract_skills_with_llm(text)
+        return [s.strip().lower() for s in llm_result.split(",") if s.strip()]
+    return get_skill_matcher().find(text)
+
+
+async def _process_chunk(chunk, use_llm, top_k):
+    parse_limit = asyncio.Semaphore(max(1, stage_pool.size))
+    parsed = []
+    for task in asyncio.as_completed([_parse(i, name, data, parse_limit) for i, name, data in chunk]):
+        index, filename, result = await task
+        if isinstance(result, Exception):
+            # Failures are reported right away; they don't wait for the chunk's scoring
+            yield {"index": index, "filename": filename, "error": str(result)}
+        else:
+            parsed.append((index, filename, result))
+
+    if not parsed:
+        return
+
+    skill_sets = await asyncio.gather(
+        *(_skills_for(resume["text"], use_llm) for _, _, resume in parsed),
+        return_exceptions=True,
+    )
+    scorable = [(i, skills) for i, skills in enumerate(skill_sets) if not isinstance(skills, Exception)]
+
+    # One batched embedding + matrix product for every resume in the chunk
+    matches = await _run_with_backoff(
+        "match", match_careers_batch, [skills for _, skills in scorable], top_k,
+        [parsed[i][2]["experience"] for i, _ in scorable], in_process=True
+    )
+    matches_by_position = dict(zip((i for i, _ in scorable), matches))
+
+    for position, (index, filename, resume) in enumerate(parsed):
+        skills = skill_sets[position]
+        if isinstance(skills, Exception):
+            yield {"index": index, "filename": filename, "error": str(skills)}
+            continue
+        yield {
+            "index": index,
+            "filename": filename,
+            "experience": resume["experience"],
+            "skills": skills,
+            "careers": format_career_matches(matches_by_position[position]),
+        }
+
+
+async def process_bulk(documents, use_llm=False, top_k=3, batch_size=BULK_BATCH_SIZE):
+    total = failed = 0
+    chunk = []
+
+    async def flush():
+        nonlocal failed
+        async for result in _process_chunk(chunk, use_llm, top_k):
+            failed += "error" in result
+            yield result
+
+    async for filename, data in documents:
+        chunk.append((total, filename, data))
+        total += 1
+        if len(chunk) >= batch_size:
+            async for result in flush():
+                yield result
+            chunk = []
+
+    if chunk:
+        async for result in flush():
+            yield result
+
+    yield {"done": True, "count": total, "failed": failed}
+
+
+async def stream_bulk_ndjson(files, use_llm=False, top_k=3):
+    documents = aiter_documents(iter_upload_documents(files))
+    try:
+        async for result in process_bulk(documents, use_llm=use_llm, top_k=top_k):
+            yield json.dumps(result) + "\n"
+    finally:
+        for _, file in files:
+            file.close()
@@ -0,0 +1,172 @@
+import os
+import sys
+import json
+import logging
+import time
+import hashlib
+import threading
+import numpy as np
+
+from core.embedder import EMBEDDING_VERSION, embed_skill_sets, shared_store
+from core.ann_index import IVFIndex, experience_mask, seniority_arrays
+from core.readiness import mark_loading, mark_ready
+
+logger = logging.getLogger(__name__)
+
+CAREER_PATHS_FILE = "data/career_paths.json"
+# exact: brute-force matrix product; ivf: approximate index; auto: ivf from CAREER_ANN_MIN_SIZE careers up
+CAREER_INDEX_MODE = os.getenv("CAREER_INDEX_MODE", "auto")
+CAREER_ANN_MIN_SIZE = int(os.getenv("CAREER_ANN_MIN_SIZE", "20000"))
+
+
+class CareerIndex:
+    def __init__(self, careers, matrix, ann=None):
+        self.careers = careers
+        self.matrix = matrix
+        self.ann = ann
+        self.min_years, self.max_years = seniority_arrays(careers) if ann is None else (None, None)
+
+    def top_k(self, user_vec, k=3, experience=None):
+        if not self.careers:
+            return []
+        if self.ann is not None:
+            return [(self.careers[i], score) for i, score in self.ann.search(user_vec, k, experience=experience)]
+
+        scores = self.matrix @ np.asarray(user_vec, dtype=np.float32)
+        return self._top(scores, k, experience)
+
+    def _top(self, scores, k, experience):
+        if experience is not None:
+            # Roles outside the candidate's seniority band drop out of the ranking
+            scores = np.where(experience_mask(self.min_years, self.max_years, experience), scores, -np.inf)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.careers[i], float(scores[i])) for i in top if np.isfinite(scores[i])]
+
+    def top_k_batch(self, user_vecs, k=3, experiences=None):
+        # `experiences`, when given, holds one value per user vector
+        user_vecs = np.asarray(user_vecs, dtype=np.float32)
+        if not self.careers or not len(user_vecs):
+            return [[] for _ in range(len(user_vecs))]
+        if self.ann is not None:
+            experiences = experiences if experiences is not None else [None] * len(user_vecs)
+            return [self.top_k(user_vec, k, experience) for user_vec, experience in zip(user_vecs, experiences)]
+
+        # Scores a whole batch of users with one matrix product
+        scores = user_vecs @ self.matrix.T
+        if experiences is None:
+            k = min(k, scores.shape[1])
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            results = []
+            for row, cols in zip(scores, top):
+                cols = cols[np.argsort(-row[cols])]
+                results.append([(self.careers[i], float(row[i])) for i in cols])
+            return results
+        return [self._top(row, k, experience) for row, experience in zip(scores, experiences)]
+
+    def stats(self):
+        stats = {"careers": len(self.careers), "mode": "ivf" if self.ann is not None else "exact"}
+        if self.ann is not None:
+            stats.update(self.ann.stats())
+        return stats
+
+
+def index_path_for(json_path):
+    return os.path.splitext(json_path)[0] + ".index.npz"
+
+
+def ann_path_for(json_path):
+    return os.path.splitext(json_path)[0] + ".ivf"
+
+
+def _content_key(raw: bytes) -> str:
+    # The embedding version is part of the key so swapping encoders invalidates the file.
+    digest = hashlib.sha256()
+    digest.update(EMBEDDING_VERSION.encode())
+    digest.update(b"\0")
+    digest.update(raw)
+    return digest.hexdigest()
+
+
+def _load_matrix(index_path, key):
+    try:
+        with np.load(index_path) as stored:
+            if str(stored["key"]) == key:
+                return stored["matrix"]
+    except (OSError, KeyError, ValueError):
+        pass
+    return None
+
+
+def _save_matrix(index_path, key, matrix):
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, key=np.array(key), matrix=matrix)
+    os.replace(tmp_path, index_path)
+
+
+def load_careers(json_path=CAREER_PATHS_FILE):
+    with open(json_path, "rb") as f:
+        raw = f.read()
+    return json.loads(raw), _content_key(raw)
+
+
+def career_matrix(json_path, careers, key, persist=True):
+    # Shared memory-mapped store first, then this worker's .npz cache, then the encoder
+    matrix = shared_store.matrix(f"careers:{os.path.basename(json_path)}", key)
+    if matrix is not None and matrix.shape[0] == len(careers):
+        return matrix
+
+    index_path = index_path_for(json_path)
+    matrix = _load_matrix(index_path, key) if persist else None
+    if matrix is None or matrix.shape[0] != len(careers):
+        logger.info(f"🔧 Building career index for {len(careers)} careers...")
+        matrix = embed_skill_sets([career.get("required_skills", []) for career in careers])
+        matrix = np.asarray(matrix, dtype=np.float32).reshape(len(careers), -1)
+        if persist:
+            _save_matrix(index_path, key, matrix)
+    return matrix
+
+
+def build_career_index(json_path=CAREER_PATHS_FILE, mode=CAREER_INDEX_MODE, nlist=None):
+    careers, key = load_careers(json_path)
+    if not careers:
+        return CareerIndex([], np.zeros((0, 0), dtype=np.float32))
+
+    use_ann = mode == "ivf" or (mode == "auto" and len(careers) >= CAREER_ANN_MIN_SIZE)
+    if not use_ann:
+        return CareerIndex(careers, career_matrix(json_path, careers, key))
+
+    # Built offline with `python -m core.career_index build`; vectors stay memory-mapped
+    ann = IVFIndex.load(ann_path_for(json_path), key)
+    if ann is None or len(ann) != len(careers):
+        matrix = career_matrix(json_path, careers, key, persist=False)
+        min_years, max_years = seniority_arrays(careers)
+        IVFIndex.build(matrix, min_years, max_years, nlist=nlist).save(ann_path_for(json_path), {"key": key})
+        ann = IVFIndex.load(ann_path_for(json_path), key)
+    return CareerIndex(careers, None, ann)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_career_index():
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                mark_loading("career_index")
+                started = time.perf_counter()
+                _index = build_career_index()
+                mark_ready("career_index", time.perf_counter() - started)
+    return _index
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3, 4) or sys.argv[1] != "build":
+        sys.exit("usage: python -m core.career_index build [CAREERS_JSON] [NLIST]")
+    path = sys.argv[2] if len(sys.argv) > 2 else CAREER_PATHS_FILE
+    built = build_career_index(path, mode="ivf", nlist=int(sys.argv[3]) if len(sys.argv) > 3 else None)
+    print(json.dumps(built.stats()))
@@ -1,12 +1,30 @@
-import os
 import json
-import google.generativeai as genai
-from dotenv import load_dotenv
 
-load_dotenv()
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+from core.llm_gateway import generate_text
+from core.executor import run_stage
+from core.career_index import get_career_index
+from core.metrics import inc, stage_timer
+from core.semantic_cache import local_career_paths, lookup_career_paths, store_career_paths
+
+
+def _lookup_without_llm(user_skills, experience):
+    # Semantic cache first, then a confident match against data/career_paths.json
+    with stage_timer("career_paths_lookup"):
+        cached, vector = lookup_career_paths(user_skills, experience)
+        if cached is not None:
+            inc("career_paths_source_total", {"source": "semantic_cache"})
+            return cached, vector
+        local = local_career_paths(get_career_index().top_k(vector, 3, experience))
+    if local:
+        inc("career_paths_source_total", {"source": "local"})
+    return (local or None), vector
+
+
+async def generate_career_paths(user_skills: list[str], experience: int = 0, model_name="gemini-1.5-flash"):
+    answer, vector = await run_stage("match", _lookup_without_llm, user_skills, experience, in_process=True)
+    if answer is not None:
+        return answer
 
-def generate_career_paths(user_skills: list[str], experience: int = 0, model_name="gemini-1.5-flash"):
     prompt = f"""
 You are an expert AI career advisor.
 
@@ -44,16 +62,18 @@ Example:
 ]
 """
     try:
-        model = genai.GenerativeModel(model_name)
-        response = model.generate_content(prompt)
-        raw_text = response.text.strip()
+        inc("career_paths_source_total", {"source": "llm"})
+        with stage_timer("career_paths_llm"):
+            raw_text = await generate_text(prompt, model=model_name, fallback=None)
 
         if "```json" in raw_text:
             raw_text = raw_text.split("```json")[1].split("```")[0].strip()
         elif "```" in raw_text:
             raw_text = raw_text.split("```")[1].strip()
 
-        return json.loads(raw_text)
+        careers = json.loads(raw_text)
+        store_career_paths(user_skills, experience, vector, careers)
+        return careers
 
     except json.JSONDecodeError as e:
         raise ValueError(f"❌ Gemini returned invalid JSON:\n{raw_text}\n\nError: {e}")
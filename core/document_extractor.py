@@ -0,0 +1,115 @@
+import io
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+MAX_DOCUMENT_BYTES = int(os.getenv("MAX_DOCUMENT_BYTES", str(10 * 1024 * 1024)))
+MAX_DOCUMENT_PAGES = int(os.getenv("MAX_DOCUMENT_PAGES", "20"))
+MAX_DOCUMENT_CHARS = int(os.getenv("MAX_DOCUMENT_CHARS", "200000"))
+# "pdfminer" (default) keeps layout closest to what the section parser expects;
+# "auto" tries the faster PyPDF2 first and falls back to pdfminer on thin output.
+PDF_BACKEND = os.getenv("PDF_BACKEND", "pdfminer")
+# Below this many characters per page the fast backend is assumed to have missed text
+MIN_CHARS_PER_PAGE = int(os.getenv("MIN_CHARS_PER_PAGE", "40"))
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class DocumentError(ValueError):
+    pass
+
+
+async def read_upload(upload, max_bytes=MAX_DOCUMENT_BYTES) -> bytes:
+    # Read in chunks and stop as soon as the limit is crossed
+    buffer = bytearray()
+    while True:
+        chunk = await upload.read(READ_CHUNK_SIZE)
+        if not chunk:
+            return bytes(buffer)
+        buffer.extend(chunk)
+        if len(buffer) > max_bytes:
+            raise DocumentError(f"File exceeds the {max_bytes} byte limit")
+
+
+def detect_format(data: bytes, filename: str = "") -> str:
+    name = (filename or "").lower()
+    if name.endswith(".pdf") or data[:5] == b"%PDF-":
+        return "pdf"
+    if name.endswith(".docx") or data[:2] == b"PK":
+        return "docx"
+    raise DocumentError("Unsupported file format")
+
+
+def _iter_pages_pypdf(data, max_pages):
+    import PyPDF2
+
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    for page in reader.pages[:max_pages]:
+        yield page.extract_text() or ""
+
+
+def _iter_pages_pdfminer(data, max_pages):
+    from pdfminer.high_level import extract_pages
+    from pdfminer.layout import LTTextContainer
+
+    for page in extract_pages(io.BytesIO(data), maxpages=max_pages):
+        yield "".join(element.get_text() for element in page if isinstance(element, LTTextContainer))
+
+
+PDF_PAGE_READERS = {
+    "pypdf": _iter_pages_pypdf,
+    "pdfminer": _iter_pages_pdfminer,
+}
+
+
+def _collect(pages, max_chars):
+    # Pages are consumed lazily, so hitting the character limit stops parsing early
+    parts = []
+    total = 0
+    page_count = 0
+    for text in pages:
+        page_count += 1
+        parts.append(text)
+        total += len(text)
+        if total >= max_chars:
+            break
+    return "\n".join(parts)[:max_chars], page_count
+
+
+def extract_pdf_text(data, max_pages=MAX_DOCUMENT_PAGES, max_chars=MAX_DOCUMENT_CHARS, backend=PDF_BACKEND):
+    if backend != "auto":
+        text, _ = _collect(PDF_PAGE_READERS[backend](data, max_pages), max_chars)
+        return text
+
+    try:
+        text, pages = _collect(_iter_pages_pypdf(data, max_pages), max_chars)
+        if pages and len(text.strip()) >= MIN_CHARS_PER_PAGE * pages:
+            return text
+    except Exception as e:
+        logger.warning(f"⚠️ PyPDF2 extraction failed, falling back to pdfminer: {e}")
+
+    text, _ = _collect(_iter_pages_pdfminer(data, max_pages), max_chars)
+    return text
+
+
+def extract_docx_text(data, max_chars=MAX_DOCUMENT_CHARS):
+    import docx2txt
+
+    return (docx2txt.process(io.BytesIO(data)) or "")[:max_chars]
+
+
+def extract_document_text(data: bytes, filename: str = "", max_bytes=MAX_DOCUMENT_BYTES,
+                          max_pages=MAX_DOCUMENT_PAGES, max_chars=MAX_DOCUMENT_CHARS) -> str:
+    if len(data) > max_bytes:
+        raise DocumentError(f"File exceeds the {max_bytes} byte limit")
+
+    kind = detect_format(data, filename)
+    try:
+        if kind == "pdf":
+            return extract_pdf_text(data, max_pages=max_pages, max_chars=max_chars)
+        return extract_docx_text(data, max_chars=max_chars)
+    except DocumentError:
+        raise
+    except Exception as e:
+        raise DocumentError(f"Could not read {kind.upper()} file: {e}") from e
@@ -1,6 +1,233 @@
-from sentence_transformers import SentenceTransformer
+import os
+import time
+import threading
+from collections import OrderedDict
+import numpy as np
+
+from core.readiness import mark_loading, mark_ready
+from core.vector_store import VECTOR_STORE_PATH, SharedVectorStore
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+# "torch" (sentence-transformers) or "onnx" (int8-quantized export, see core/onnx_embedder.py)
+EMBEDDER_BACKEND = os.getenv("EMBEDDER_BACKEND", "torch")
+EMBEDDER_ONNX_DIR = os.getenv("EMBEDDER_ONNX_DIR", "models/all-MiniLM-L6-v2-int8")
+# Intra-op threads for the encoder; 0 keeps the runtime's default
+EMBEDDER_THREADS = int(os.getenv("EMBEDDER_THREADS", "0"))
+# "auto" skips loading the model at startup when the shared vector store is available
+EMBEDDER_PRELOAD = os.getenv("EMBEDDER_PRELOAD", "auto")
+# Bump when the way skill-set vectors are pooled changes; persisted indexes key on it.
+EMBEDDING_VERSION = f"{MODEL_NAME}:{EMBEDDER_BACKEND}:skill-mean-v1"
+
+SKILL_CACHE_SIZE = int(os.getenv("SKILL_CACHE_SIZE", "20000"))
+SKILL_CACHE_FILE = os.getenv("SKILL_CACHE_FILE", "")
+ENCODE_BATCH_SIZE = int(os.getenv("ENCODE_BATCH_SIZE", "64"))
+
+# Precomputed vectors shared by all workers; consulted before the per-worker LRU and the encoder
+shared_store = SharedVectorStore(VECTOR_STORE_PATH, EMBEDDING_VERSION)
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def load_model(backend=EMBEDDER_BACKEND):
+    if backend == "onnx":
+        from core.onnx_embedder import OnnxSentenceEncoder
+
+        return OnnxSentenceEncoder(EMBEDDER_ONNX_DIR, threads=EMBEDDER_THREADS)
+
+    # sentence_transformers pulls in torch, so it is only imported on first use
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    if EMBEDDER_THREADS:
+        torch.set_num_threads(EMBEDDER_THREADS)
+    return SentenceTransformer(MODEL_NAME, device="cpu")
+
+
+def get_model():
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                mark_loading("embedder")
+                started = time.perf_counter()
+                _model = load_model()
+                mark_ready("embedder", time.perf_counter() - started)
+    return _model
+
+
+def warm_embedder():
+    if EMBEDDER_PRELOAD == "auto" and "skills" in shared_store.stats()["tables"]:
+        # Skills the store doesn't cover still load the model, on first use
+        mark_ready("embedder")
+        return None
+    return get_model()
+
+
+def canonical_skill(skill: str) -> str:
+    return " ".join(skill.strip().lower().split())
+
+
+class SkillEmbeddingCache:
+    def __init__(self, max_size=SKILL_CACHE_SIZE, path="", store=None):
+        self.max_size = max_size
+        self.path = path
+        self.store = store
+        self._vectors = OrderedDict()
+        self._lock = threading.Lock()
+        self.shared_hits = 0
+        self.hits = 0
+        self.misses = 0
+        self.encode_calls = 0
+        self.last_batch_size = 0
+        self.max_batch_size = 0
+        if path:
+            self.load()
+
+    def get_many(self, skills):
+        keys = [canonical_skill(s) for s in skills]
+        found = {}
+        missing = []
+
+        if self.store is not None and keys:
+            # Read-only views into the shared mapping; nothing is copied into this worker
+            unique = list(dict.fromkeys(keys))
+            for key, vec in zip(unique, self.store.get_many("skills", unique)):
+                if vec is not None:
+                    found[key] = vec
+
+        with self._lock:
+            self.shared_hits += sum(1 for key in keys if key in found)
+            for key in keys:
+                if key in found:
+                    continue
+                vec = self._vectors.get(key)
+                if vec is None:
+                    if key not in missing:
+                        missing.append(key)
+                    continue
+                self._vectors.move_to_end(key)
+                found[key] = vec
+            self.misses += len(missing)
+            self.hits += len(keys) - len(missing)
+
+        if missing:
+            # All misses go through the encoder in one batched call
+            encoded = get_model().encode(
+                missing,
+                batch_size=ENCODE_BATCH_SIZE,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+            ).astype(np.float32)
+            with self._lock:
+                self.encode_calls += 1
+                self.last_batch_size = len(missing)
+                self.max_batch_size = max(self.max_batch_size, len(missing))
+                for key, vec in zip(missing, encoded):
+                    found[key] = vec
+                    self._vectors[key] = vec
+                    self._vectors.move_to_end(key)
+                while len(self._vectors) > self.max_size:
+                    self._vectors.popitem(last=False)
+
+        return [found[key] for key in keys]
+
+    def keys(self):
+        with self._lock:
+            return list(self._vectors)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._vectors),
+                "max_size": self.max_size,
+                "shared_hits": self.shared_hits,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "encode_calls": self.encode_calls,
+                "last_batch_size": self.last_batch_size,
+                "max_batch_size": self.max_batch_size,
+            }
+
+    def load(self):
+        try:
+            with np.load(self.path) as stored:
+                if str(stored["version"]) != EMBEDDING_VERSION:
+                    return
+                keys = [str(k) for k in stored["keys"]]
+                matrix = stored["matrix"].astype(np.float32)
+        except (OSError, KeyError, ValueError):
+            return
+
+        with self._lock:
+            for key, vec in zip(keys[-self.max_size:], matrix[-self.max_size:]):
+                self._vectors[key] = vec
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            keys = list(self._vectors.keys())
+            vectors = list(self._vectors.values())
+        if not keys:
+            return
+
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                version=np.array(EMBEDDING_VERSION),
+                keys=np.array(keys),
+                matrix=np.stack(vectors),
+            )
+        os.replace(tmp_path, self.path)
+
+
+skill_cache = SkillEmbeddingCache(SKILL_CACHE_SIZE, SKILL_CACHE_FILE, shared_store)
+
+
+def embedding_dim():
+    return get_model().get_sentence_embedding_dimension()
+
+
+def _pool(vectors):
+    if not vectors:
+        return np.zeros(embedding_dim(), dtype=np.float32)
+    pooled = np.mean(vectors, axis=0)
+    norm = np.linalg.norm(pooled)
+    return (pooled / norm if norm > 0 else pooled).astype(np.float32)
+
+
+def embed_skill_vectors(skills):
+    # One L2-normalized row per skill, in input order
+    vectors = skill_cache.get_many(skills)
+    if not vectors:
+        return np.zeros((0, embedding_dim()), dtype=np.float32)
+    return np.stack(vectors)
 
-model = SentenceTransformer("all-MiniLM-L6-v2")
 
 def embed_skills(skills):
-    return model.encode(", ".join(skills), convert_to_tensor=True)
+    skills = [s for s in skills if canonical_skill(s)]
+    return _pool(skill_cache.get_many(skills))
+
+
+def embed_skill_sets(skill_sets):
+    # Every distinct skill across all sets is resolved with a single cache lookup
+    skill_sets = [[s for s in skills if canonical_skill(s)] for skills in skill_sets]
+    unique = list(dict.fromkeys(canonical_skill(s) for skills in skill_sets for s in skills))
+    by_skill = dict(zip(unique, skill_cache.get_many(unique)))
+
+    pooled = [_pool([by_skill[canonical_skill(s)] for s in skills]) for skills in skill_sets]
+    if not pooled:
+        return np.zeros((0, embedding_dim()), dtype=np.float32)
+    return np.stack(pooled)
+
+
+def embedding_cache_stats():
+    return skill_cache.stats()
+
+
+def save_skill_cache():
+    skill_cache.save()
@@ -0,0 +1,114 @@
+import os
+import asyncio
+import functools
+import threading
+import contextvars
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from core.metrics import inc, stage_timer
+
+# "thread" or "process"; process pools let PDF parsing and regex work use every core
+WORKER_POOL_KIND = os.getenv("WORKER_POOL_KIND", "thread")
+WORKER_POOL_SIZE = int(os.getenv("WORKER_POOL_SIZE", str(os.cpu_count() or 2)))
+# Jobs allowed to wait beyond the ones already running before new work is rejected
+WORKER_QUEUE_LIMIT = int(os.getenv("WORKER_QUEUE_LIMIT", "32"))
+WORKER_RETRY_AFTER_SECONDS = int(os.getenv("WORKER_RETRY_AFTER_SECONDS", "2"))
+
+
+class PoolSaturatedError(RuntimeError):
+    def __init__(self, stage, retry_after=WORKER_RETRY_AFTER_SECONDS):
+        super().__init__(f"Worker pool is full, rejected stage '{stage}'")
+        self.stage = stage
+        self.retry_after = retry_after
+
+
+class StagePool:
+    def __init__(self, kind=WORKER_POOL_KIND, size=WORKER_POOL_SIZE, queue_limit=WORKER_QUEUE_LIMIT):
+        self.kind = kind
+        self.size = size
+        self.capacity = size + queue_limit
+        self._executor = None
+        self._local_executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._stages = {}
+
+    def _get_executor(self, in_process):
+        with self._lock:
+            if in_process or self.kind != "process":
+                if self._local_executor is None:
+                    self._local_executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="stage")
+                return self._local_executor
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.size)
+            return self._executor
+
+    def _stage(self, stage):
+        stats = self._stages.get(stage)
+        if stats is None:
+            stats = {"depth": 0, "max_depth": 0, "completed": 0, "failed": 0, "rejected": 0}
+            self._stages[stage] = stats
+        return stats
+
+    def _admit(self, stage):
+        with self._lock:
+            stats = self._stage(stage)
+            if self._pending >= self.capacity:
+                stats["rejected"] += 1
+                inc("worker_pool_rejected_total", {"stage": stage})
+                raise PoolSaturatedError(stage)
+            self._pending += 1
+            stats["depth"] += 1
+            stats["max_depth"] = max(stats["max_depth"], stats["depth"])
+
+    def _release(self, stage, ok):
+        with self._lock:
+            stats = self._stage(stage)
+            self._pending -= 1
+            stats["depth"] -= 1
+            stats["completed" if ok else "failed"] += 1
+
+    async def run(self, stage, fn, *args, in_process=False):
+        # in_process pins work to threads for stages that rely on per-process state
+        # (the loaded embedding model and its caches)
+        self._admit(stage)
+        ok = False
+        try:
+            loop = asyncio.get_running_loop()
+            executor = self._get_executor(in_process)
+            if isinstance(executor, ThreadPoolExecutor):
+                # Carry the request context into the thread so nested stage timers reach Server-Timing
+                call = functools.partial(contextvars.copy_context().run, fn, *args)
+            else:
+                call = functools.partial(fn, *args)
+            with stage_timer(f"pool_{stage}"):
+                result = await loop.run_in_executor(executor, call)
+            ok = True
+            return result
+        finally:
+            self._release(stage, ok)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "kind": self.kind,
+                "size": self.size,
+                "capacity": self.capacity,
+                "pending": self._pending,
+                "stages": {name: dict(stats) for name, stats in self._stages.items()},
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executors = [self._executor, self._local_executor]
+            self._executor = self._local_executor = None
+        for executor in executors:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+
+stage_pool = StagePool()
+
+
+async def run_stage(stage, fn, *args, in_process=False):
+    return await stage_pool.run(stage, fn, *args, in_process=in_process)
@@ -0,0 +1,27 @@
+import os
+import threading
+import time
+from dotenv import load_dotenv
+
+from core.readiness import mark_loading, mark_ready
+
+load_dotenv()
+
+_genai = None
+_lock = threading.Lock()
+
+
+def get_genai():
+    # google.generativeai is imported and configured once, on first use
+    global _genai
+    if _genai is None:
+        with _lock:
+            if _genai is None:
+                mark_loading("gemini")
+                started = time.perf_counter()
+                import google.generativeai as genai
+
+                genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+                _genai = genai
+                mark_ready("gemini", time.perf_counter() - started)
+    return _genai
@@ -0,0 +1,246 @@
+import os
+import json
+import uuid
+import shutil
+import threading
+import numpy as np
+
+from core.recommender import parse_job_experience
+from core.skill_matcher import get_skill_matcher
+
+JOB_INDEX_DIR = os.getenv("JOB_INDEX_DIR", "data/job_index")
+# Ingests within this window are written to disk together; 0 saves after every ingest
+JOB_INDEX_SAVE_DELAY_SECONDS = float(os.getenv("JOB_INDEX_SAVE_DELAY_SECONDS", "5"))
+
+WORD_BITS = 64
+
+
+class JobIndex:
+    """Stored postings as packed skill bitsets, ranked with vectorized popcounts.
+
+    Skill IDs start with the canonical taxonomy IDs from the skill matcher;
+    skills outside the taxonomy get new IDs appended to the vocabulary.
+    """
+
+    def __init__(self, directory=JOB_INDEX_DIR, save_delay=JOB_INDEX_SAVE_DELAY_SECONDS):
+        self.directory = directory
+        self.save_delay = save_delay
+        self.vocab = list(get_skill_matcher().skills)
+        self.vocab_ids = {skill: i for i, skill in enumerate(self.vocab)}
+        self.postings = []
+        self._rows = {}
+        self.bits = np.zeros((0, self._words()), dtype=np.uint64)
+        self.required_experience = np.zeros(0, dtype=np.int16)
+        self.skill_counts = np.zeros(0, dtype=np.int32)
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._save_timer = None
+        self._dirty = False
+
+    def _words(self, vocab_size=None):
+        return max(1, -(-(vocab_size or len(self.vocab)) // WORD_BITS))
+
+    def _skill_id(self, skill, grow):
+        matcher = get_skill_matcher()
+        name = matcher.canonicalize(skill)
+        skill_id = self.vocab_ids.get(name)
+        if skill_id is None and grow:
+            skill_id = len(self.vocab)
+            self.vocab.append(name)
+            self.vocab_ids[name] = skill_id
+        return skill_id
+
+    def _pack(self, skill_ids, words):
+        row = np.zeros(words, dtype=np.uint64)
+        for skill_id in skill_ids:
+            row[skill_id // WORD_BITS] |= np.uint64(1) << np.uint64(skill_id % WORD_BITS)
+        return row
+
+    def _unpack(self, row):
+        bits = np.unpackbits(row.view(np.uint8), bitorder="little")
+        return [self.vocab[i] for i in np.flatnonzero(bits) if i < len(self.vocab)]
+
+    def add_postings(self, postings, persist=True):
+        matcher = get_skill_matcher()
+        with self._lock:
+            added = []
+            rows_ids = []
+            for posting in postings:
+                text = posting.get("text", "")
+                skills = posting.get("skills") or matcher.find(text)
+                ids = sorted({i for i in (self._skill_id(s, grow=True) for s in skills) if i is not None})
+                required, _ = parse_job_experience(text)
+                meta = {
+                    "id": posting.get("id") or uuid.uuid4().hex,
+                    "title": posting.get("title", ""),
+                    "company": posting.get("company", ""),
+                    "required_experience": required,
+                }
+                added.append(meta)
+                rows_ids.append(ids)
+
+            words = self._words()
+            bits = self.bits
+            if words > bits.shape[1]:
+                # The vocabulary outgrew the packed width; widen existing rows with zero words
+                pad = np.zeros((bits.shape[0], words - bits.shape[1]), dtype=np.uint64)
+                bits = np.hstack([bits, pad])
+
+            # A posting id that is already indexed replaces its row instead of adding a second one
+            targets = []
+            appended = {}
+            for meta in added:
+                row = self._rows.get(meta["id"], appended.get(meta["id"]))
+                if row is None:
+                    row = appended[meta["id"]] = len(self.postings) + len(appended)
+                targets.append(row)
+
+            # New arrays rather than in-place writes, so rank() and save() keep a consistent snapshot
+            bits = np.vstack([bits, np.zeros((len(appended), words), dtype=np.uint64)])
+            required_experience = np.concatenate([self.required_experience, np.zeros(len(appended), dtype=np.int16)])
+            skill_counts = np.concatenate([self.skill_counts, np.zeros(len(appended), dtype=np.int32)])
+            postings = self.postings + [None] * len(appended)
+            for row, meta, ids in zip(targets, added, rows_ids):
+                bits[row] = self._pack(ids, words)
+                required_experience[row] = meta["required_experience"]
+                skill_counts[row] = len(ids)
+                postings[row] = meta
+
+            self.bits, self.required_experience, self.skill_counts, self.postings = (
+                bits, required_experience, skill_counts, postings
+            )
+            self._rows.update(appended)
+
+        if persist:
+            self.schedule_save()
+        return added
+
+    def rank(self, skills, experience=0, top_k=10, require_experience=False):
+        with self._lock:
+            bits, counts, required, postings = self.bits, self.skill_counts, self.required_experience, self.postings
+            words = bits.shape[1]
+            resume_ids = {i for i in (self._skill_id(s, grow=False) for s in skills) if i is not None}
+            resume_row = self._pack([i for i in resume_ids if i < words * WORD_BITS], words)
+
+        if not postings:
+            return []
+
+        overlap = np.bitwise_count(bits & resume_row).sum(axis=1, dtype=np.int32)
+        scores = np.divide(overlap, counts, out=np.zeros(len(counts), dtype=np.float64), where=counts > 0)
+        experience_ok = required <= experience
+        if require_experience:
+            scores = np.where(experience_ok, scores, -1.0)
+
+        k = min(top_k, len(scores))
+        if k <= 0:
+            return []
+        # Experience fit breaks ties between equal overlap scores
+        rank_key = scores + experience_ok * 1e-6
+        top = np.argpartition(-rank_key, k - 1)[:k]
+        top = top[np.argsort(-rank_key[top])]
+
+        results = []
+        for i in top:
+            if scores[i] < 0:
+                continue
+            matched = bits[i] & resume_row
+            results.append({
+                **postings[i],
+                "score": int(scores[i] * 100),
+                "matched": self._unpack(matched),
+                "missing": self._unpack(bits[i] & ~matched),
+                "experience_match": bool(experience_ok[i]),
+            })
+        return results
+
+    def schedule_save(self):
+        with self._lock:
+            self._dirty = True
+            if self.save_delay > 0:
+                if self._save_timer is None:
+                    self._save_timer = threading.Timer(self.save_delay, self.flush)
+                    self._save_timer.daemon = True
+                    self._save_timer.start()
+                return
+        self.flush()
+
+    def flush(self):
+        """Writes pending changes, if any; returns whether anything was saved."""
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if not self._dirty:
+                return False
+            self._dirty = False
+        self.save()
+        return True
+
+    def save(self):
+        # Arrays are replaced, never mutated, on ingest; the lists are copied so ranking isn't blocked while writing
+        with self._lock:
+            arrays = {
+                "bits": self.bits,
+                "required_experience": self.required_experience,
+                "skill_counts": self.skill_counts,
+            }
+            meta = {"vocab": list(self.vocab), "postings": list(self.postings)}
+
+        with self._save_lock:
+            # Written to a sibling directory and swapped in, so the arrays and meta.json always match
+            tmp_path = f"{self.directory}.{os.getpid()}.tmp"
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            os.makedirs(tmp_path)
+            np.savez(os.path.join(tmp_path, "arrays.npz"), **arrays)
+            with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+                json.dump(meta, f)
+
+            old_path = f"{self.directory}.{os.getpid()}.old"
+            if os.path.isdir(self.directory):
+                os.replace(self.directory, old_path)
+            os.replace(tmp_path, self.directory)
+            shutil.rmtree(old_path, ignore_errors=True)
+
+    def load(self):
+        meta_path = os.path.join(self.directory, "meta.json")
+        if not os.path.exists(meta_path):
+            return self
+        with open(meta_path) as f:
+            meta = json.load(f)
+        with np.load(os.path.join(self.directory, "arrays.npz")) as arrays:
+            with self._lock:
+                self.vocab = meta["vocab"]
+                self.vocab_ids = {skill: i for i, skill in enumerate(self.vocab)}
+                self.postings = meta["postings"]
+                self._rows = {posting["id"]: row for row, posting in enumerate(self.postings)}
+                self.bits = arrays["bits"]
+                self.required_experience = arrays["required_experience"]
+                self.skill_counts = arrays["skill_counts"]
+        return self
+
+    def stats(self):
+        return {
+            "postings": len(self.postings),
+            "unsaved": self._dirty,
+            "vocab_size": len(self.vocab),
+            "bytes": int(self.bits.nbytes + self.required_experience.nbytes + self.skill_counts.nbytes),
+        }
+
+
+_job_index = None
+_job_index_lock = threading.Lock()
+
+
+def get_job_index():
+    global _job_index
+    if _job_index is None:
+        with _job_index_lock:
+            if _job_index is None:
+                _job_index = JobIndex().load()
+    return _job_index
+
+
+def save_job_index():
+    # Called on shutdown so postings still waiting for the debounced save aren't lost
+    if _job_index is not None:
+        _job_index.flush()
@@ -0,0 +1,91 @@
+import os
+import asyncio
+import logging
+
+from core.metrics import inc, registry
+
+logger = logging.getLogger(__name__)
+
+LLM_BATCH_WINDOW_MS = float(os.getenv("LLM_BATCH_WINDOW_MS", "25"))
+LLM_BATCH_MAX_SIZE = int(os.getenv("LLM_BATCH_MAX_SIZE", "8"))
+
+BATCH_SIZE_BUCKETS = (1, 2, 3, 4, 6, 8, 12, 16, 24, 32)
+
+
+class MicroBatcher:
+    """Collects jobs submitted within a short window and hands them to `handler` together.
+
+    `handler` is an async callable taking a list of items and returning a list of the
+    same length; an Exception in that list fails only the matching submission.
+    """
+
+    def __init__(self, name, handler, window_ms=LLM_BATCH_WINDOW_MS, max_size=LLM_BATCH_MAX_SIZE):
+        self.name = name
+        self.handler = handler
+        self.window = window_ms / 1000
+        self.max_size = max(1, max_size)
+        self._loop = None
+        self._pending = []
+        self._timer = None
+        self._tasks = set()
+
+    @property
+    def enabled(self):
+        return self.max_size > 1 and self.window > 0
+
+    async def submit(self, item):
+        if not self.enabled:
+            return (await self.handler([item]))[0]
+
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Futures are bound to a loop; start fresh if the app is served from a new one
+            self._loop, self._pending, self._timer = loop, [], None
+            self._tasks = set()
+
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            # Hold a reference so the running batch isn't garbage collected mid-flight
+            task = self._loop.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        registry.observe("llm_batch_size", len(batch), {"batcher": self.name}, buckets=BATCH_SIZE_BUCKETS)
+        inc("llm_batches_total", {"batcher": self.name})
+        items = [item for item, _ in batch]
+        try:
+            results = await self.handler(items)
+        except Exception as e:
+            results = [e] * len(batch)
+        if len(results) != len(batch):
+            error = RuntimeError(f"{self.name} handler returned {len(results)} results for {len(batch)} items")
+            results = [error] * len(batch)
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "window_ms": self.window * 1000,
+            "max_size": self.max_size,
+            "pending": len(self._pending),
+        }
@@ -0,0 +1,279 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from core.gemini import get_genai
+from core.metrics import inc, registry, stage_timer
+from core.model_router import ModelRouter
+
+logger = logging.getLogger(__name__)
+
+PRIMARY_MODEL = "gemini-1.5-pro"
+FALLBACK_MODEL = "gemini-1.5-flash"
+
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+# Start the same prompt on the fallback model when the first one hasn't answered by then; 0 disables
+LLM_HEDGE_AFTER_SECONDS = float(os.getenv("LLM_HEDGE_AFTER_SECONDS", "0"))
+
+
+class LLMTimeoutError(RuntimeError):
+    pass
+
+
+def is_quota_error(error) -> bool:
+    message = str(error)
+    return "429" in message or "quota" in message.lower()
+
+
+class GeminiBackend:
+    def __init__(self):
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def _model(self, model_name):
+        # One GenerativeModel per model name, shared by all requests
+        model = self._models.get(model_name)
+        if model is None:
+            with self._lock:
+                model = self._models.get(model_name)
+                if model is None:
+                    model = get_genai().GenerativeModel(model_name)
+                    self._models[model_name] = model
+        return model
+
+    def generate(self, prompt, model_name):
+        response = self._model(model_name).generate_content(prompt)
+        return response.text
+
+    def stream(self, prompt, model_name):
+        for chunk in self._model(model_name).generate_content(prompt, stream=True):
+            if chunk.text:
+                yield chunk.text
+
+
+class FakeBackend:
+    # Deterministic stand-in for Gemini, used by benchmarks and local runs
+    def __init__(self, responder=None, latency=0.0):
+        self.responder = responder or self.default_response
+        self.latency = latency
+        self.calls = []
+
+    @staticmethod
+    def default_response(prompt, model_name):
+        return os.getenv("FAKE_LLM_RESPONSE", "python, sql, communication")
+
+    def generate(self, prompt, model_name):
+        self.calls.append(model_name)
+        if self.latency:
+            time.sleep(self.latency)
+        return self.responder(prompt, model_name)
+
+    def stream(self, prompt, model_name, chunk_size=16):
+        self.calls.append(model_name)
+        text = self.responder(prompt, model_name)
+        chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)] or [""]
+        for chunk in chunks:
+            if self.latency:
+                time.sleep(self.latency / len(chunks))
+            yield chunk
+
+
+def make_backend(name=LLM_BACKEND):
+    if name == "fake":
+        return FakeBackend(latency=float(os.getenv("FAKE_LLM_LATENCY", "0")))
+    return GeminiBackend()
+
+
+class LLMGateway:
+    def __init__(self, backend=None, max_concurrency=LLM_MAX_CONCURRENCY, timeout=LLM_TIMEOUT_SECONDS,
+                 router=None, hedge_after=LLM_HEDGE_AFTER_SECONDS):
+        self.backend = backend or make_backend()
+        self.router = router or ModelRouter()
+        self.timeout = timeout
+        self.hedge_after = hedge_after
+        self.max_concurrency = max_concurrency
+        # Blocking SDK calls run on a dedicated pool so they never stall the event loop
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="llm")
+        self._semaphore = None
+
+    def _limit(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _call(self, prompt, model_name, timeout):
+        loop = asyncio.get_running_loop()
+        async with self._limit():
+            future = loop.run_in_executor(self._executor, self.backend.generate, prompt, model_name)
+            started = time.perf_counter()
+            outcome = "error"
+            try:
+                with stage_timer("llm"):
+                    text = await asyncio.wait_for(future, timeout or self.timeout)
+                outcome = "ok"
+                self.router.record_success(model_name)
+                return text
+            except asyncio.TimeoutError:
+                outcome = "timeout"
+                raise LLMTimeoutError(f"{model_name} did not respond within {timeout or self.timeout}s")
+            except asyncio.CancelledError:
+                outcome = "cancelled"
+                raise
+            except Exception as e:
+                outcome = "quota" if is_quota_error(e) else "error"
+                if outcome == "quota":
+                    self.router.record_quota_error(model_name, e)
+                raise
+            finally:
+                if outcome not in ("ok", "quota"):
+                    self.router.record_error(model_name)
+                inc("llm_requests_total", {"model": model_name, "outcome": outcome})
+                registry.observe("llm_request_duration_seconds", time.perf_counter() - started, {"model": model_name})
+
+    async def _stream(self, prompt, model_name, timeout):
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        cancelled = threading.Event()
+        done = object()
+
+        def pump():
+            # Runs on the LLM pool; stops pulling from the upstream stream once cancelled
+            iterator = self.backend.stream(prompt, model_name)
+            try:
+                for chunk in iterator:
+                    if cancelled.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, chunk)
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                close = getattr(iterator, "close", None)
+                if close is not None:
+                    close()
+
+        async with self._limit():
+            loop.run_in_executor(self._executor, pump)
+            try:
+                while True:
+                    try:
+                        # The timeout bounds the gap between chunks, not the whole completion
+                        item = await asyncio.wait_for(queue.get(), timeout or self.timeout)
+                    except asyncio.TimeoutError:
+                        raise LLMTimeoutError(f"{model_name} stalled for more than {timeout or self.timeout}s")
+                    if item is done:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    yield item
+            finally:
+                cancelled.set()
+
+    def _route(self, model, fallback):
+        # Yields the models to try in order, skipping ones the router says are exhausted or tripped
+        chain = [name for name in (model, fallback) if name]
+        for i, name in enumerate(chain):
+            last = i == len(chain) - 1
+            if self.router.admit(name, "primary" if i == 0 else "fallback"):
+                yield name, chain[i + 1] if not last else None
+            elif last:
+                self.router.force(name)
+                yield name, None
+
+    async def _hedged_call(self, prompt, model_name, hedge, timeout):
+        # Returns (text, model that produced it)
+        if not hedge or self.hedge_after <= 0:
+            return await self._call(prompt, model_name, timeout), model_name
+
+        primary = asyncio.ensure_future(self._call(prompt, model_name, timeout))
+        done, _ = await asyncio.wait({primary}, timeout=self.hedge_after)
+        if done or not self.router.admit(hedge, "hedge"):
+            return await primary, model_name
+
+        backup = asyncio.ensure_future(self._call(prompt, hedge, timeout))
+        pending = {primary, backup}
+        errors = {}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    inc("llm_hedges_total", {"winner": "primary" if task is primary else "hedge"})
+                    return task.result(), model_name if task is primary else hedge
+                errors[task] = task.exception()
+        inc("llm_hedges_total", {"winner": "none"})
+        raise errors[primary]
+
+    async def stream(self, prompt, model=PRIMARY_MODEL, fallback=FALLBACK_MODEL, timeout=None):
+        started = False
+        for name, next_model in self._route(model, fallback):
+            try:
+                async for chunk in self._stream(prompt, name, timeout):
+                    started = True
+                    yield chunk
+                self.router.record_success(name)
+                return
+            except (GeneratorExit, asyncio.CancelledError):
+                # Client went away; chunks arriving at all means the model is serving us
+                if started:
+                    self.router.record_success(name)
+                else:
+                    self.router.record_error(name)
+                raise
+            except Exception as e:
+                quota = is_quota_error(e)
+                if quota:
+                    self.router.record_quota_error(name, e)
+                else:
+                    self.router.record_error(name)
+                # Only fall back if nothing has been sent yet; a half-streamed answer can't be restarted
+                if started or not next_model or not quota:
+                    raise
+                logger.warning(f"⚠️ {name} quota hit. Falling back to {next_model}...")
+                inc("llm_fallbacks_total", {"from": name, "to": next_model})
+
+    async def generate(self, prompt, model=PRIMARY_MODEL, fallback=FALLBACK_MODEL, timeout=None) -> str:
+        text, _ = await self.generate_with_model(prompt, model=model, fallback=fallback, timeout=timeout)
+        return text
+
+    async def generate_with_model(self, prompt, model=PRIMARY_MODEL, fallback=FALLBACK_MODEL, timeout=None):
+        """Like generate(), but also returns the model that answered (fallback or hedge included)."""
+        for name, next_model in self._route(model, fallback):
+            try:
+                text, answered_by = await self._hedged_call(prompt, name, next_model, timeout)
+                return text.strip(), answered_by
+            except Exception as e:
+                if not next_model or not is_quota_error(e):
+                    raise
+                logger.warning(f"⚠️ {name} quota hit. Falling back to {next_model}...")
+                inc("llm_fallbacks_total", {"from": name, "to": next_model})
+
+
+gateway = LLMGateway()
+
+
+def get_gateway():
+    return gateway
+
+
+def set_backend(backend):
+    # Swap the backend in place (e.g. a FakeBackend in benchmarks)
+    gateway.backend = backend
+
+
+async def generate_text(prompt, model=PRIMARY_MODEL, fallback=FALLBACK_MODEL, timeout=None) -> str:
+    return await gateway.generate(prompt, model=model, fallback=fallback, timeout=timeout)
+
+
+async def generate_text_with_model(prompt, model=PRIMARY_MODEL, fallback=FALLBACK_MODEL, timeout=None):
+    return await gateway.generate_with_model(prompt, model=model, fallback=fallback, timeout=timeout)
+
+
+def stream_text(prompt, model=PRIMARY_MODEL, fallback=FALLBACK_MODEL, timeout=None):
+    return gateway.stream(prompt, model=model, fallback=fallback, timeout=timeout)
@@ -0,0 +1,144 @@
+import time
+import bisect
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# Seconds; covers sub-millisecond cache hits up to slow LLM round trips
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Per-request list of (stage, seconds) used to build the Server-Timing header
+request_timings = contextvars.ContextVar("request_timings", default=None)
+# Per-request list of (task, tokens before, tokens after) for prompt compaction
+request_prompt_tokens = contextvars.ContextVar("request_prompt_tokens", default=None)
+
+TOKEN_BUCKETS = (100, 250, 500, 1000, 1500, 2000, 3000, 4000, 6000, 8000, 16000)
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._help = {}
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((labels or {}).items()))
+
+    def observe(self, name, value, labels=None, help_text="", buckets=DEFAULT_BUCKETS):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+            if help_text:
+                self._help.setdefault(name, help_text)
+
+    def inc(self, name, labels=None, value=1, help_text=""):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+            if help_text:
+                self._help.setdefault(name, help_text)
+
+    @staticmethod
+    def _labels(pairs, extra=()):
+        pairs = list(pairs) + list(extra)
+        if not pairs:
+            return ""
+        body = ",".join(f'{k}="{str(v)}"'.replace("\n", " ") for k, v in pairs)
+        return "{" + body + "}"
+
+    def render(self):
+        # Prometheus text exposition format
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+            lines = []
+            seen = set()
+
+            for (name, labels), value in counters:
+                if name not in seen:
+                    seen.add(name)
+                    lines.append(f"# HELP {name} {self._help.get(name, name)}")
+                    lines.append(f"# TYPE {name} counter")
+                lines.append(f"{name}{self._labels(labels)} {value}")
+
+            for (name, labels), histogram in histograms:
+                if name not in seen:
+                    seen.add(name)
+                    lines.append(f"# HELP {name} {self._help.get(name, name)}")
+                    lines.append(f"# TYPE {name} histogram")
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{self._labels(labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{name}_bucket{self._labels(labels, [('le', '+Inf')])} {histogram.count}")
+                lines.append(f"{name}_sum{self._labels(labels)} {histogram.total}")
+                lines.append(f"{name}_count{self._labels(labels)} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def inc(name, labels=None, value=1):
+    registry.inc(name, labels, value)
+
+
+@contextmanager
+def stage_timer(stage):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        registry.observe("stage_duration_seconds", elapsed, {"stage": stage}, "Time spent in each pipeline stage")
+        timings = request_timings.get()
+        if timings is not None:
+            timings.append((stage, elapsed))
+
+
+def record_prompt_tokens(task, before, after):
+    registry.observe("prompt_tokens", before, {"task": task, "stage": "raw"},
+                     "Estimated prompt tokens before and after compaction", buckets=TOKEN_BUCKETS)
+    registry.observe("prompt_tokens", after, {"task": task, "stage": "compacted"}, buckets=TOKEN_BUCKETS)
+    counts = request_prompt_tokens.get()
+    if counts is not None:
+        counts.append((task, before, after))
+
+
+def prompt_tokens_header(counts):
+    return ", ".join(f"{task};raw={before};compacted={after}" for task, before, after in counts)
+
+
+def server_timing_header(timings, total=None):
+    parts = []
+    totals = {}
+    for stage, seconds in timings:
+        totals[stage] = totals.get(stage, 0.0) + seconds
+    for stage, seconds in totals.items():
+        parts.append(f"{stage.replace('.', '-')};dur={seconds * 1000:.1f}")
+    if total is not None:
+        parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+def render_prometheus():
+    return registry.render()
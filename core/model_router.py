@@ -0,0 +1,181 @@
+import os
+import re
+import time
+import logging
+import threading
+
+from core.metrics import inc
+
+logger = logging.getLogger(__name__)
+
+# "gemini-1.5-pro=2,gemini-1.5-flash=15" (requests per minute); unlisted models are unlimited
+LLM_RPM_LIMITS = os.getenv("LLM_RPM_LIMITS", "")
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "3"))
+LLM_BREAKER_COOLDOWN_SECONDS = float(os.getenv("LLM_BREAKER_COOLDOWN_SECONDS", "60"))
+
+RETRY_DELAY_PATTERN = re.compile(r"retry_delay\s*\{\s*seconds:\s*(\d+)")
+
+
+def parse_rpm_limits(spec):
+    limits = {}
+    for item in spec.split(","):
+        name, _, value = item.partition("=")
+        if name.strip() and value.strip():
+            limits[name.strip()] = float(value)
+    return limits
+
+
+def retry_delay_seconds(error):
+    # Gemini 429s usually say how long to back off; honour it when present
+    match = RETRY_DELAY_PATTERN.search(str(error))
+    return float(match.group(1)) if match else None
+
+
+class TokenBucket:
+    def __init__(self, rate_per_minute, clock=time.monotonic):
+        self.capacity = max(1.0, rate_per_minute)
+        self.rate = rate_per_minute / 60
+        self.tokens = self.capacity
+        self.clock = clock
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self):
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def drain(self):
+        # The provider says we're out, whatever our estimate thought
+        self._refill()
+        self.tokens = 0.0
+
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, threshold=LLM_BREAKER_THRESHOLD, cooldown=LLM_BREAKER_COOLDOWN_SECONDS, clock=time.monotonic):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_until = 0.0
+
+    def allow(self):
+        if self.state == self.OPEN and self.clock() >= self.opened_until:
+            # Let a single probe through; its outcome decides whether we close again
+            self.state = self.HALF_OPEN
+            return True
+        return self.state == self.CLOSED
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def release(self):
+        # The probe ended without telling us anything about quota; allow another one right away
+        if self.state == self.HALF_OPEN:
+            self.state = self.OPEN
+            self.opened_until = self.clock()
+
+    def record_failure(self, cooldown=None):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+            self.state = self.OPEN
+            self.opened_until = self.clock() + max(self.cooldown, cooldown or 0)
+
+
+class ModelRouter:
+    """Decides which model a call goes to, based on per-model quota estimates and 429 history."""
+
+    def __init__(self, rpm_limits=None, threshold=LLM_BREAKER_THRESHOLD, cooldown=LLM_BREAKER_COOLDOWN_SECONDS,
+                 clock=time.monotonic):
+        self.rpm_limits = parse_rpm_limits(LLM_RPM_LIMITS) if rpm_limits is None else rpm_limits
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self._buckets = {}
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def _breaker(self, model):
+        breaker = self._breakers.get(model)
+        if breaker is None:
+            breaker = self._breakers[model] = CircuitBreaker(self.threshold, self.cooldown, self.clock)
+        return breaker
+
+    def _bucket(self, model):
+        if model not in self.rpm_limits:
+            return None
+        bucket = self._buckets.get(model)
+        if bucket is None:
+            bucket = self._buckets[model] = TokenBucket(self.rpm_limits[model], self.clock)
+        return bucket
+
+    def admit(self, model, reason="primary"):
+        """Reserve a call on `model`; False means the caller should route elsewhere."""
+        with self._lock:
+            breaker = self._breaker(model)
+            if not breaker.allow():
+                decision = "breaker_open"
+            else:
+                bucket = self._bucket(model)
+                decision = reason if bucket is None or bucket.try_acquire() else "throttled"
+                if decision == "throttled" and breaker.state == CircuitBreaker.HALF_OPEN:
+                    # The probe never went out; stay open rather than stranding the breaker half-open
+                    breaker.state = CircuitBreaker.OPEN
+        inc("llm_route_decisions_total", {"model": model, "decision": decision})
+        return decision == reason
+
+    def force(self, model):
+        # Last candidate in the chain: call it anyway rather than failing without trying
+        inc("llm_route_decisions_total", {"model": model, "decision": "forced"})
+
+    def record_success(self, model):
+        with self._lock:
+            breaker = self._breaker(model)
+            previous = breaker.state
+            breaker.record_success()
+        if previous != CircuitBreaker.CLOSED:
+            self._transition(model, CircuitBreaker.CLOSED)
+
+    def record_error(self, model):
+        with self._lock:
+            self._breaker(model).release()
+
+    def record_quota_error(self, model, error):
+        with self._lock:
+            breaker = self._breaker(model)
+            previous = breaker.state
+            breaker.record_failure(retry_delay_seconds(error))
+            bucket = self._bucket(model)
+            if bucket is not None:
+                bucket.drain()
+            state = breaker.state
+        if state != previous:
+            self._transition(model, state)
+
+    def _transition(self, model, state):
+        logger.warning(f"⚠️ {model} circuit breaker is now {state}")
+        inc("llm_breaker_transitions_total", {"model": model, "state": state})
+
+    def stats(self):
+        with self._lock:
+            now = self.clock()
+            return {
+                model: {
+                    "state": breaker.state,
+                    "consecutive_429s": breaker.failures,
+                    "reopens_in_seconds": round(max(0.0, breaker.opened_until - now), 1)
+                    if breaker.state == CircuitBreaker.OPEN else 0.0,
+                    "tokens": round(self._buckets[model].tokens, 2) if model in self._buckets else None,
+                }
+                for model, breaker in self._breakers.items()
+            }
@@ -0,0 +1,39 @@
+import threading
+import time
+
+# Components loaded lazily or by the startup warm-up task
+COMPONENTS = ("embedder", "career_index", "gemini")
+
+_lock = threading.Lock()
+_status = {name: {"state": "pending"} for name in COMPONENTS}
+
+
+def mark_loading(name):
+    with _lock:
+        if _status.get(name, {}).get("state") != "ready":
+            _status[name] = {"state": "loading", "since": time.time()}
+
+
+def mark_ready(name, load_seconds=None):
+    with _lock:
+        entry = {"state": "ready"}
+        if load_seconds is not None:
+            entry["load_seconds"] = round(load_seconds, 3)
+        _status[name] = entry
+
+
+def mark_failed(name, error):
+    with _lock:
+        _status[name] = {"state": "failed", "error": str(error)}
+
+
+def is_ready(name):
+    with _lock:
+        return _status.get(name, {}).get("state") == "ready"
+
+
+def readiness():
+    with _lock:
+        components = {name: dict(entry) for name, entry in _status.items()}
+    ready = all(entry["state"] == "ready" for entry in components.values())
+    return {"ready": ready, "components": components}
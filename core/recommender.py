@@ -1,80 +1,136 @@
 import os
 import re
 import json
-from datetime import datetime
-from dateutil import parser
-from pdfminer.high_level import extract_text
-from dotenv import load_dotenv
-import google.generativeai as genai
-from sentence_transformers import util
+import asyncio
+import logging
 
-from core.embedder import embed_skills
+from core.llm_gateway import PRIMARY_MODEL, generate_text_with_model
+from core.llm_cache import cache_key, llm_cache
+from core.llm_batcher import MicroBatcher
+from core.embedder import embed_skills, embed_skill_sets
+from core.career_index import get_career_index
+from core.document_extractor import extract_document_text
+from core.resume_parser import parse_resume
+from core.metrics import inc, record_prompt_tokens, stage_timer
 
-load_dotenv()
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+logger = logging.getLogger(__name__)
+
+# Bump whenever the skill extraction prompt changes so cached results are not reused
+SKILL_PROMPT_VERSION = "skills-v2"
 
 
 def extract_sections(text: str):
-    sections = {}
-    current_section = "general"
-    sections[current_section] = []
+    return parse_resume(text).sections
+
 
-    for line in text.split("\n"):
-        line_clean = line.strip().lower()
+def extract_experience_from_text(text: str) -> int:
+    return parse_resume(text).experience
 
-        if re.match(r"^(work\s+)?experience$|^professional experience$|^employment$", line_clean):
-            current_section = "experience"
-        elif re.match(r"^education$|^academic background$", line_clean):
-            current_section = "education"
-        elif re.match(r"^projects$|^personal projects$", line_clean):
-            current_section = "projects"
-        elif re.match(r"^certifications?$|^courses?$", line_clean):
-            current_section = "certifications"
-        elif re.match(r"^skills$", line_clean):
-            current_section = "skills"
 
-        if current_section not in sections:
-            sections[current_section] = []
-        sections[current_section].append(line)
+# Sections worth sending to the LLM per task, in the order they are packed into the budget
+PROMPT_SECTIONS = {
+    "skills": ("skills", "experience", "projects"),
+    "docs": ("general", "experience", "projects", "skills", "certifications", "education"),
+}
+PROMPT_TOKEN_BUDGETS = {
+    "skills": int(os.getenv("SKILL_PROMPT_TOKEN_BUDGET", "1500")),
+    "docs": int(os.getenv("DOCS_PROMPT_TOKEN_BUDGET", "2500")),
+}
 
-    return sections
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+CONTACT_PATTERN = re.compile(
+    r"[\w.+-]+@[\w-]+\.[\w.]+"
+    r"|https?://\S+|www\.\S+|linkedin\.com/\S*|github\.com/\S*"
+    r"|(?:\+?\d{1,3}[\s.-]?)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}\b",
+    re.IGNORECASE,
+)
 
 
-def extract_experience_from_text(text: str) -> int:
+def estimate_tokens(text: str) -> int:
+    # Close enough to Gemini's SentencePiece counts for budgeting: ~4 characters per piece
+    return sum((len(token) + 3) // 4 for token in TOKEN_PATTERN.findall(text))
+
+
+def _compact_lines(lines, seen, drop_contacts):
+    for line in lines:
+        line = WHITESPACE_PATTERN.sub(" ", line).strip()
+        if not line or (drop_contacts and CONTACT_PATTERN.search(line)):
+            continue
+        # pdfminer repeats page headers and footers; one copy is enough
+        key = line.lower()
+        if key in seen:
+            continue
+        seen.add(key)
+        yield line
+
+
+def compact_resume_text(text: str, task: str, budget: int = None) -> str:
+    """Trim a resume down to the sections `task` needs, within a token budget."""
     sections = extract_sections(text)
-    experience_text = "\n".join(sections.get("experience", []))
+    budget = PROMPT_TOKEN_BUDGETS[task] if budget is None else budget
+    # A section holding only its heading line has nothing to offer
+    wanted = [name for name in PROMPT_SECTIONS[task] if name == "general" or len(sections.get(name, [])) > 1]
+    if wanted in ([], ["general"]):
+        # No recognisable headings, so everything landed in "general"
+        wanted = ["general"]
 
-    date_range_pattern = r"([A-Z][a-z]+\s+\d{4})\s*[\u2013\u2014\-]\s*(Present|[A-Z][a-z]+\s+\d{4})"
-    matches = re.findall(date_range_pattern, experience_text)
+    seen = set()
+    blocks = []
+    used = 0
+    for name in wanted:
+        kept = []
+        # Contact details only ever sit in the header block above the first section
+        for line in _compact_lines(sections.get(name, []), seen, drop_contacts=name == "general"):
+            cost = estimate_tokens(line) + 1
+            if used + cost > budget:
+                break
+            kept.append(line)
+            used += cost
+        if kept:
+            blocks.append("\n".join(kept))
+        if used >= budget:
+            break
 
-    total_months = 0
-    for start, end in matches:
-        try:
-            start_date = parser.parse(start)
-            end_date = datetime.now() if "present" in end.lower() else parser.parse(end)
-            months = (end_date.year - start_date.year) * 12 + (end_date.month - start_date.month)
-            if months > 0:
-                total_months += months
-                print(f"✅ COUNTED: {start} to {end} → {months} months")
-        except Exception as e:
-            print(f"❌ PARSE ERROR: {start} to {end} → {e}")
+    compacted = "\n\n".join(blocks)
+    record_prompt_tokens(task, estimate_tokens(text), estimate_tokens(compacted))
+    return compacted
 
-    years = round(total_months / 12)
-    print(f"📊 FINAL Work Experience: {years} years")
-    return years
 
+JOB_EXPERIENCE_PATTERN = re.compile(r"(\d+)[\s\-+]*(?:\d+)?\s*(?:years|yrs).+?(?:experience|work)")
+TOOL_EXPERIENCE_PATTERN = re.compile(r"(\d+)[\s\-+]*(?:\d+)?\s*(?:years|yrs).+?with\s+([a-zA-Z\.\+#]+)")
 
-def extract_resume_text(file_path):
-    full_text = extract_text(file_path)
-    experience = extract_experience_from_text(full_text)
+
+def parse_job_experience(job_text: str):
+    # Returns (required years, {tool: years}) from a job description
+    text = job_text.lower()
+    required = max([int(m) for m in JOB_EXPERIENCE_PATTERN.findall(text)], default=0)
+    tool_experience = {
+        tool.lower(): int(years)
+        for years, tool in TOOL_EXPERIENCE_PATTERN.findall(text)
+        if years.isdigit()
+    }
+    return required, tool_experience
+
+
+def extract_resume_from_bytes(data: bytes, filename: str = ""):
+    with stage_timer("pdf_extract"):
+        full_text = extract_document_text(data, filename)
+    with stage_timer("experience"):
+        parsed = parse_resume(full_text)
     return {
         "text": full_text,
-        "experience": experience
+        "sections": parsed.sections,
+        "experience": parsed.experience
     }
 
 
-def extract_skills_with_llm(resume_text):
-    prompt = f"""
+def extract_resume_text(file_path):
+    with open(file_path, "rb") as f:
+        return extract_resume_from_bytes(f.read(), file_path)
+
+
+SKILL_PROMPT = """
 Extract all relevant technical and soft skills from the following resume text. This includes:
 
 - Programming languages (Python, R, Java, etc.)
@@ -88,29 +144,137 @@ Return as a comma-separated list of clean, lowercase skill names.
 Resume:
 {resume_text}
 """
+
+BATCH_SKILL_PROMPT = """
+Extract all relevant technical and soft skills from each of the resumes below. This includes:
+
+- Programming languages (Python, R, Java, etc.)
+- Frameworks and libraries (Scikit-learn, React, Tableau, etc.)
+- Data science/statistics terms (A/B Testing, Regression, Clustering, etc.)
+- Tools and platforms (AWS, Azure, Git, Power BI, etc.)
+- Soft skills (Teamwork, Communication, Agile, etc.)
+
+Each resume starts with a line "=== RESUME <id> ===". Treat every resume independently.
+Return only a JSON object mapping each resume id to a comma-separated list of clean, lowercase skill names, e.g.
+{{"1": "python, sql, teamwork", "2": "java, aws"}}
+
+{documents}
+"""
+
+
+def build_batch_skill_prompt(resume_texts):
+    documents = "\n".join(
+        f"=== RESUME {i} ===\n{text.strip()}\n" for i, text in enumerate(resume_texts, start=1)
+    )
+    return BATCH_SKILL_PROMPT.format(documents=documents)
+
+
+def parse_batch_skill_response(raw_text, count):
+    # Returns one skill string per resume, or None where the model's answer is unusable
+    results = [None] * count
+    start, end = raw_text.find("{"), raw_text.rfind("}")
+    if start == -1 or end <= start:
+        return results
+    try:
+        parsed = json.loads(raw_text[start:end + 1])
+    except json.JSONDecodeError:
+        return results
+    if not isinstance(parsed, dict):
+        return results
+
+    for i in range(count):
+        value = parsed.get(str(i + 1))
+        if isinstance(value, list):
+            value = ", ".join(str(v) for v in value)
+        if isinstance(value, str) and value.strip():
+            results[i] = value.strip()
+    return results
+
+
+async def _extract_skills_single(resume_text):
+    with stage_timer("llm_skills"):
+        return await generate_text_with_model(SKILL_PROMPT.format(resume_text=resume_text))
+
+
+async def _extract_skills_batch(resume_texts):
+    # One (skills, model) pair per resume; identical resumes submitted together share one slot in the prompt
+    unique = list(dict.fromkeys(resume_texts))
+    if len(unique) == 1:
+        try:
+            result = await _extract_skills_single(unique[0])
+        except Exception as e:
+            result = e
+        return [result] * len(resume_texts)
+
     try:
-        model = genai.GenerativeModel("gemini-1.5-pro")
-        response = model.generate_content(prompt)
-        return response.text.strip()
+        with stage_timer("llm_skills_batch"):
+            raw, model = await generate_text_with_model(build_batch_skill_prompt(unique))
+        parsed = [None if skills is None else (skills, model) for skills in parse_batch_skill_response(raw, len(unique))]
     except Exception as e:
-        if "quota" in str(e).lower() or "429" in str(e):
-            print("⚠️ Gemini PRO quota hit. Falling back to Flash...")
-            model = genai.GenerativeModel("gemini-1.5-flash")
-            response = model.generate_content(prompt)
-            return response.text.strip()
-        raise e
+        logger.warning(f"⚠️ Batched skill extraction failed, retrying individually: {e}")
+        parsed = [None] * len(unique)
+
+    missing = [i for i, result in enumerate(parsed) if result is None]
+    inc("llm_batch_items_total", {"batcher": "skills", "outcome": "ok"}, len(unique) - len(missing))
+    if missing:
+        inc("llm_batch_items_total", {"batcher": "skills", "outcome": "fallback"}, len(missing))
+        retried = await asyncio.gather(
+            *(_extract_skills_single(unique[i]) for i in missing), return_exceptions=True
+        )
+        for i, result in zip(missing, retried):
+            parsed[i] = result
+
+    by_text = dict(zip(unique, parsed))
+    return [by_text[text] for text in resume_texts]
+
+
+skill_batcher = MicroBatcher("skills", _extract_skills_batch)
+
+
+async def extract_skills_with_llm(resume_text, compact=True):
+    # Only a resume's skills, experience and projects sections reach the prompt.
+    # Job descriptions and free text have other headings and are sent as they are.
+    if compact:
+        resume_text = compact_resume_text(resume_text, "skills")
+    key = cache_key(resume_text, SKILL_PROMPT_VERSION, PRIMARY_MODEL)
+    cached = await llm_cache.aget(key)
+    inc("llm_cache_lookups_total", {"result": "miss" if cached is None else "hit"})
+    if cached is not None:
+        return cached
+
+    # Concurrent misses are folded into one multi-resume prompt to spare the RPM quota
+    result, model = await skill_batcher.submit(resume_text)
+    if model == PRIMARY_MODEL:
+        await llm_cache.aset(key, result)
+    else:
+        # A fallback answer must not sit under the primary model's key for the whole TTL
+        inc("llm_cache_skips_total", {"model": model})
+    return result
+
 
+def match_careers(user_skills, top_k=3, experience=None):
+    # With `experience`, roles whose seniority band doesn't fit are skipped
+    index = get_career_index()
+    with stage_timer("embed"):
+        user_vec = embed_skills(user_skills)
+    with stage_timer("score"):
+        return index.top_k(user_vec, top_k, experience)
 
-def match_careers(user_skills):
-    with open("data/career_paths.json") as f:
-        careers = json.load(f)
 
-    user_vec = embed_skills(user_skills)
-    scored = []
+def match_careers_batch(skill_sets, top_k=3, experiences=None):
+    index = get_career_index()
+    with stage_timer("embed"):
+        user_vecs = embed_skill_sets(skill_sets)
+    with stage_timer("score"):
+        return index.top_k_batch(user_vecs, top_k, experiences)
 
-    for career in careers:
-        career_vec = embed_skills(career["required_skills"])
-        score = util.cos_sim(user_vec, career_vec).item()
-        scored.append((career, score))
 
-    return sorted(scored, key=lambda x: x[1], reverse=True)[:3]
+def format_career_matches(top_matches):
+    return [
+        {
+            "title": career.get("title", career.get("career", "Untitled Role")),
+            "description": career.get("description", "No description provided."),
+            "score": round(score, 3)
+        }
+        for career, score in top_matches
+    ]
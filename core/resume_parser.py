@@ -0,0 +1,131 @@
+import re
+import functools
+from datetime import datetime
+from dataclasses import dataclass, field
+from dateutil import parser as date_parser
+
+# "Month YYYY – Present|Month YYYY"; the ranges may wrap onto the next line
+DATE_RANGE = r"(?P<range_start>[A-Z][a-z]+\s+\d{4})\s*[–—\-]\s*(?P<range_end>Present|[A-Z][a-z]+\s+\d{4})"
+
+# Heading lines (whole line, any case) and date ranges, found in one scan.
+# Headings are matched per line, so their inner whitespace never crosses a newline.
+RESUME_TOKEN_PATTERN = re.compile(
+    r"^[^\S\n]*(?i:"
+    r"(?P<experience>(?:work[^\S\n]+)?experience|professional experience|employment)"
+    r"|(?P<education>education|academic background)"
+    r"|(?P<projects>projects|personal projects)"
+    r"|(?P<certifications>certifications?|courses?)"
+    r"|(?P<skills>(?:(?:technical|core|key)[^\S\n]+)?skills(?:[^\S\n]*(?:&|and)[^\S\n]*\w+)?:?)"
+    r")[^\S\n]*$"
+    rf"|{DATE_RANGE}",
+    re.MULTILINE,
+)
+
+MONTHS = {
+    name: number
+    for number, names in enumerate(
+        (
+            ("jan", "january"), ("feb", "february"), ("mar", "march"), ("apr", "april"),
+            ("may",), ("jun", "june"), ("jul", "july"), ("aug", "august"),
+            ("sep", "sept", "september"), ("oct", "october"), ("nov", "november"), ("dec", "december"),
+        ),
+        start=1,
+    )
+    for name in names
+}
+
+
+@dataclass
+class DateRange:
+    section: str
+    start: str
+    end: str
+    offset: int
+    line: int
+    # (start month, end month) as year * 12 + month; None if a date didn't parse
+    months: tuple = None
+
+
+@dataclass
+class ParsedResume:
+    sections: dict
+    # (section, first line number, start offset, end offset) for each block, in document order
+    blocks: list = field(default_factory=list)
+    date_ranges: list = field(default_factory=list)
+
+    @property
+    def experience(self) -> int:
+        return experience_years(r.months for r in self.date_ranges if r.section == "experience")
+
+
+@functools.lru_cache(maxsize=4096)
+def month_index(text: str):
+    # Fast path for "Month YYYY"; anything else goes through dateutil once and is remembered
+    name, _, year = text.partition(" ")
+    month = MONTHS.get(name.lower())
+    if month is not None and year.strip().isdigit():
+        return int(year) * 12 + month
+    try:
+        parsed = date_parser.parse(text)
+    except (ValueError, OverflowError):
+        return None
+    return parsed.year * 12 + parsed.month
+
+
+def range_months(start: str, end: str, now=None):
+    first = month_index(" ".join(start.split()))
+    if "present" in end.lower():
+        now = now or datetime.now()
+        last = now.year * 12 + now.month
+    else:
+        last = month_index(" ".join(end.split()))
+    if first is None or last is None:
+        return None
+    return first, last
+
+
+def experience_years(intervals) -> int:
+    # Overlapping jobs (or the same job listed twice) count once
+    total = 0
+    current_start = current_end = None
+    for start, end in sorted(i for i in intervals if i is not None and i[1] > i[0]):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                total += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        total += current_end - current_start
+    return round(total / 12)
+
+
+def parse_resume(text: str) -> ParsedResume:
+    """Sections, block offsets and date ranges from a single scan of the text."""
+    sections = {"general": []}
+    blocks = []
+    date_ranges = []
+    current, block_start, block_line = "general", 0, 0
+    line, line_pos = 0, 0
+
+    for match in RESUME_TOKEN_PATTERN.finditer(text):
+        offset = match.start()
+        line += text.count("\n", line_pos, offset)
+        line_pos = offset
+        kind = match.lastgroup
+        if kind == "range_end":
+            date_ranges.append(DateRange(
+                current, match["range_start"], match["range_end"], offset, line,
+                range_months(match["range_start"], match["range_end"]),
+            ))
+            continue
+        if offset > block_start:
+            # Everything up to the newline in front of this heading belongs to the previous section
+            sections.setdefault(current, []).extend(text[block_start:offset - 1].split("\n"))
+            blocks.append((current, block_line, block_start, offset))
+        current, block_start, block_line = kind, offset, line
+
+    sections.setdefault(current, []).extend(text[block_start:].split("\n"))
+    blocks.append((current, block_line, block_start, len(text)))
+    return ParsedResume(sections, blocks, date_ranges)
+
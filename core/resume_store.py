@@ -0,0 +1,76 @@
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+RESUME_STORE_SIZE = int(os.getenv("RESUME_STORE_SIZE", "1000"))
+RESUME_TTL_SECONDS = float(os.getenv("RESUME_TTL_SECONDS", "3600"))
+
+
+@dataclass
+class ResumeSession:
+    id: str
+    text: str
+    sections: dict
+    experience: int
+    skills: list
+    expires_at: float = field(default=0.0)
+
+
+class ResumeStore:
+    # Bounded LRU of parsed resumes; entries expire RESUME_TTL_SECONDS after their last use
+    def __init__(self, max_size=RESUME_STORE_SIZE, ttl=RESUME_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def put(self, text, sections, experience, skills):
+        session = ResumeSession(
+            id=uuid.uuid4().hex,
+            text=text,
+            sections=sections,
+            experience=experience,
+            skills=list(skills),
+            expires_at=time.monotonic() + self.ttl,
+        )
+        with self._lock:
+            self._sessions[session.id] = session
+            self._evict(time.monotonic())
+        return session
+
+    def get(self, resume_id):
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(resume_id or "")
+            if session is None or session.expires_at <= now:
+                self._sessions.pop(resume_id or "", None)
+                self.misses += 1
+                return None
+            session.expires_at = now + self.ttl
+            self._sessions.move_to_end(resume_id)
+            self.hits += 1
+            return session
+
+    def _evict(self, now):
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if len(self._sessions) <= self.max_size and oldest.expires_at > now:
+                break
+            self._sessions.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._sessions),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+resume_store = ResumeStore()
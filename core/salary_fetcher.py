@@ -1,52 +1,167 @@
 # backend/serpapi_salary.py
 
-import requests
 import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+import httpx
 from dotenv import load_dotenv
 
+from core.metrics import inc, stage_timer
+
+logger = logging.getLogger(__name__)
+
 load_dotenv()
 SERPAPI_KEY = os.getenv("SERPAPI_KEY")
+# Point at a local stand-in to run offline
+SERPAPI_URL = os.getenv("SERPAPI_URL", "https://serpapi.com/search.json")
+
+SALARY_CACHE_TTL_SECONDS = float(os.getenv("SALARY_CACHE_TTL_SECONDS", str(6 * 3600)))
+SALARY_CACHE_SIZE = int(os.getenv("SALARY_CACHE_SIZE", "2048"))
+SALARY_TIMEOUT_SECONDS = float(os.getenv("SALARY_TIMEOUT_SECONDS", "10"))
+SALARY_MAX_CONNECTIONS = int(os.getenv("SALARY_MAX_CONNECTIONS", "20"))
+
 
-def fetch_salary_samples(job_title, location="United States"):
-    url = "https://serpapi.com/search.json"
-    params = {
-        "engine": "google_jobs",
-        "q": f"{job_title} in {location}",
-        "api_key": SERPAPI_KEY,
-    }
-
-    try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()
-
-        jobs = data.get("jobs_results", [])
-        samples = []
-
-        for job in jobs[:5]:  # limit to top 5 listings
-            title = job.get("title", "")
-            company = job.get("company_name", "")
-            salary = job.get("salary")
-
-            # Check job_highlights
-            if not salary and isinstance(job.get("job_highlights"), dict):
-                for cat, items in job["job_highlights"].items():
-                    for item in items:
-                        if "$" in item or "₹" in item:
-                            salary = item
-                            break
-
-            # Scrape from description
-            if not salary and "description" in job:
-                lines = job["description"].split("\n")
-                for line in lines:
-                    if "$" in line or "₹" in line:
-                        salary = line.strip()
+def parse_salary_samples(data):
+    jobs = data.get("jobs_results", [])
+    samples = []
+
+    for job in jobs[:5]:  # limit to top 5 listings
+        title = job.get("title", "")
+        company = job.get("company_name", "")
+        salary = job.get("salary")
+
+        # Check job_highlights
+        if not salary and isinstance(job.get("job_highlights"), dict):
+            for cat, items in job["job_highlights"].items():
+                for item in items:
+                    if "$" in item or "₹" in item:
+                        salary = item
                         break
 
-            if salary:
-                samples.append(f"{title} at {company} — {salary}")
+        # Scrape from description
+        if not salary and "description" in job:
+            lines = job["description"].split("\n")
+            for line in lines:
+                if "$" in line or "₹" in line:
+                    salary = line.strip()
+                    break
+
+        if salary:
+            samples.append(f"{title} at {company} — {salary}")
+    return samples
+
+
+class SalaryService:
+    def __init__(self, url=SERPAPI_URL, api_key=SERPAPI_KEY, ttl=SALARY_CACHE_TTL_SECONDS,
+                 cache_size=SALARY_CACHE_SIZE, timeout=SALARY_TIMEOUT_SECONDS, transport=None):
+        self.url = url
+        self.api_key = api_key
+        self.ttl = ttl
+        self.cache_size = cache_size
+        self.timeout = timeout
+        self.transport = transport
+        self._client = None
+        self._cache = OrderedDict()
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.upstream_calls = 0
+
+    def _get_client(self):
+        # One pooled client reuses connections across requests
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=SALARY_MAX_CONNECTIONS),
+                transport=self.transport,
+            )
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @staticmethod
+    def _key(job_title, location):
+        return (" ".join(job_title.lower().split()), " ".join(location.lower().split()))
+
+    async def _fetch_upstream(self, key, job_title, location):
+        params = {
+            "engine": "google_jobs",
+            "q": f"{job_title} in {location}",
+            "api_key": self.api_key,
+        }
+        self.upstream_calls += 1
+        try:
+            with stage_timer("salary_upstream"):
+                response = await self._get_client().get(self.url, params=params)
+                response.raise_for_status()
+                samples = parse_salary_samples(response.json())
+        except Exception as e:
+            inc("salary_upstream_errors_total")
+            logger.error(f"❌ Error fetching salary: {e}")
+            return []
+
+        self._cache[key] = (time.monotonic() + self.ttl, samples)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
         return samples
-    except Exception as e:
-        print(f"❌ Error fetching salary: {e}")
-        return []
+
+    async def fetch(self, job_title, location="United States"):
+        key = self._key(job_title, location)
+        entry = self._cache.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self._cache.move_to_end(key)
+            self.hits += 1
+            inc("salary_lookups_total", {"result": "hit"})
+            return list(entry[1])
+        self.misses += 1
+
+        # Single flight: concurrent requests for the same title share one upstream call
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_upstream(key, job_title, location))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+            inc("salary_lookups_total", {"result": "miss"})
+        else:
+            self.coalesced += 1
+            inc("salary_lookups_total", {"result": "coalesced"})
+
+        return list(await asyncio.shield(task))
+
+    async def fetch_many(self, job_titles, location="United States"):
+        titles = list(dict.fromkeys(job_titles))
+        results = await asyncio.gather(*(self.fetch(title, location) for title in titles))
+        return dict(zip(titles, results))
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "cache_size": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "coalesced": self.coalesced,
+            "upstream_calls": self.upstream_calls,
+            "inflight": len(self._inflight),
+        }
+
+
+salary_service = SalaryService()
+
+
+async def fetch_salary_samples(job_title, location="United States"):
+    return await salary_service.fetch(job_title, location)
+
+
+async def fetch_salary_samples_batch(job_titles, location="United States"):
+    return await salary_service.fetch_many(job_titles, location)
@@ -0,0 +1,147 @@
+import os
+import time
+import threading
+import numpy as np
+
+from core.embedder import canonical_skill, embed_skills
+
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "2000"))
+SEMANTIC_CACHE_TTL_SECONDS = float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", str(24 * 3600)))
+# Minimum career_paths.json match score for answering without the LLM
+LOCAL_ANSWER_THRESHOLD = float(os.getenv("LOCAL_ANSWER_THRESHOLD", "0.85"))
+
+EXPERIENCE_BUCKETS = ((2, "entry"), (5, "mid"), (10, "senior"))
+
+
+def experience_bucket(years) -> str:
+    for upper, name in EXPERIENCE_BUCKETS:
+        if (years or 0) < upper:
+            return name
+    return "lead"
+
+
+def normalize_skill_set(skills):
+    return sorted({canonical_skill(s) for s in skills if canonical_skill(s)})
+
+
+class SemanticCache:
+    """Cosine-similarity cache over skill-set vectors, partitioned by experience bucket.
+
+    Vectors live in one preallocated matrix so a lookup is a single masked
+    matrix-vector product; the least recently used slot is evicted when full.
+    """
+
+    def __init__(self, threshold=SEMANTIC_CACHE_THRESHOLD, max_size=SEMANTIC_CACHE_SIZE, ttl=SEMANTIC_CACHE_TTL_SECONDS):
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl = ttl
+        self._vectors = None
+        self._buckets = np.full(max_size, -1, dtype=np.int16)
+        self._expires = np.zeros(max_size, dtype=np.float64)
+        self._last_used = np.zeros(max_size, dtype=np.float64)
+        self._values = [None] * max_size
+        self._slot_keys = [None] * max_size
+        self._keys = {}
+        self._bucket_ids = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _bucket_id(self, bucket):
+        return self._bucket_ids.setdefault(bucket, len(self._bucket_ids))
+
+    def lookup(self, vector, bucket):
+        now = time.time()
+        with self._lock:
+            if self._vectors is None:
+                self.misses += 1
+                return None
+            live = (self._buckets == self._bucket_id(bucket)) & (self._expires > now)
+            if not live.any():
+                self.misses += 1
+                return None
+            scores = np.where(live, self._vectors @ vector, -1.0)
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                self.misses += 1
+                return None
+            self._last_used[best] = now
+            self.hits += 1
+            return self._values[best], float(scores[best])
+
+    def store(self, key, vector, bucket, value):
+        now = time.time()
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_size, len(vector)), dtype=np.float32)
+
+            slot = self._keys.get((key, bucket))
+            if slot is None:
+                free = np.flatnonzero((self._buckets < 0) | (self._expires <= now))
+                if len(free):
+                    slot = int(free[0])
+                else:
+                    slot = int(np.argmin(self._last_used))
+                    self.evictions += 1
+                if self._slot_keys[slot] is not None:
+                    self._keys.pop(self._slot_keys[slot], None)
+                self._keys[(key, bucket)] = slot
+                self._slot_keys[slot] = (key, bucket)
+
+            self._vectors[slot] = vector
+            self._buckets[slot] = self._bucket_id(bucket)
+            self._expires[slot] = now + self.ttl
+            self._last_used[slot] = now
+            self._values[slot] = value
+
+    def clear(self):
+        with self._lock:
+            self._buckets[:] = -1
+            self._expires[:] = 0
+            self._values = [None] * self.max_size
+            self._slot_keys = [None] * self.max_size
+            self._keys = {}
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._keys),
+                "max_size": self.max_size,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+career_path_cache = SemanticCache()
+
+
+def lookup_career_paths(skills, experience):
+    # Returns (cached answer or None, query vector) so a miss can be stored without re-embedding
+    normalized = normalize_skill_set(skills)
+    vector = embed_skills(normalized)
+    hit = career_path_cache.lookup(vector, experience_bucket(experience))
+    return (hit[0] if hit else None), vector
+
+
+def store_career_paths(skills, experience, vector, answer):
+    key = "|".join(normalize_skill_set(skills))
+    career_path_cache.store(key, vector, experience_bucket(experience), answer)
+
+
+def local_career_paths(career_matches, threshold=LOCAL_ANSWER_THRESHOLD):
+    # career_paths.json entries already use the LLM's schema (career, required_skills, courses)
+    confident = [career for career, score in career_matches if score >= threshold]
+    return [
+        {
+            "career": career.get("career", career.get("title", "")),
+            "required_skills": career.get("required_skills", []),
+            "courses": career.get("courses", []),
+        }
+        for career in confident
+    ]
@@ -0,0 +1,104 @@
+import threading
+
+from core.skills_db import load_skill_taxonomy
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+class SkillMatcher:
+    """Aho-Corasick automaton over every skill name and alias.
+
+    Text is scanned once regardless of taxonomy size; matches only count when
+    they sit on token boundaries, so "r" and "c" no longer hit every resume.
+    """
+
+    def __init__(self, taxonomy):
+        self.skills = list(taxonomy)
+        self.skill_ids = {skill: i for i, skill in enumerate(self.skills)}
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+
+        for skill_id, skill in enumerate(self.skills):
+            for name in [skill, *taxonomy[skill]]:
+                pattern = _normalize(name)
+                if pattern:
+                    self._add(pattern, skill_id)
+                    self.skill_ids.setdefault(pattern, skill_id)
+        self._link()
+
+    def _add(self, pattern, skill_id):
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((skill_id, len(pattern)))
+
+    def _link(self):
+        # Breadth-first failure links; outputs are merged so each state lists every suffix match
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find_ids(self, text):
+        text = _normalize(text)
+        goto, fail, out = self._goto, self._fail, self._out
+        last = len(text) - 1
+        found = set()
+        state = 0
+
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not out[state]:
+                continue
+            if i < last and text[i + 1].isalnum():
+                continue
+            for skill_id, length in out[state]:
+                start = i - length + 1
+                if start == 0 or not text[start - 1].isalnum():
+                    found.add(skill_id)
+
+        return sorted(found)
+
+    def find(self, text):
+        return [self.skills[i] for i in self.find_ids(text)]
+
+    def canonical_id(self, name):
+        return self.skill_ids.get(_normalize(name))
+
+    def canonicalize(self, name):
+        skill_id = self.canonical_id(name)
+        return self.skills[skill_id] if skill_id is not None else _normalize(name)
+
+
+_matcher = None
+_matcher_lock = threading.Lock()
+
+
+def get_skill_matcher():
+    global _matcher
+    if _matcher is None:
+        with _matcher_lock:
+            if _matcher is None:
+                _matcher = SkillMatcher(load_skill_taxonomy())
+    return _matcher
@@ -1,5 +1,8 @@
 # core/skills_db.py
 
+import os
+import json
+
 skills_db = [
     "python", "r", "sql", "java", "javascript", "c",
     "scikit-learn", "pandas", "numpy", "matplotlib", "seaborn",
@@ -11,3 +14,32 @@ skills_db = [
     "microsoft fabric", "data engineering", "data visualization",
     "regression", "clustering", "classification", "data mining"
 ]
+
+# Alternate spellings that should resolve to a canonical entry in skills_db
+skill_aliases = {
+    "scikit-learn": ["scikit learn", "sklearn"],
+    "power bi": ["powerbi"],
+    "javascript": ["js"],
+    "d3.js": ["d3", "d3js"],
+    "aws": ["amazon web services"],
+    "azure": ["microsoft azure"],
+    "sagemaker": ["aws sagemaker", "amazon sagemaker"],
+    "ai": ["artificial intelligence"],
+    "a/b testing": ["ab testing", "a/b tests", "split testing"],
+    "machine learning": ["ml"],
+    "deep learning": ["dl"],
+    "data visualization": ["data visualisation"],
+    "etl": ["extract transform load"],
+}
+
+# Optional JSON taxonomy ({"canonical": ["alias", ...]}) merged on top of the list above
+SKILLS_TAXONOMY_FILE = os.getenv("SKILLS_TAXONOMY_FILE", "")
+
+
+def load_skill_taxonomy(path=SKILLS_TAXONOMY_FILE):
+    taxonomy = {skill: list(skill_aliases.get(skill, [])) for skill in skills_db}
+    if path and os.path.exists(path):
+        with open(path) as f:
+            for skill, aliases in json.load(f).items():
+                taxonomy.setdefault(skill.lower(), []).extend(a.lower() for a in aliases)
+    return taxonomy
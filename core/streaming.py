@@ -0,0 +1,49 @@
+import re
+import json
+
+
+def sse_event(event, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class JSONFieldStreamParser:
+    """Pulls top-level string fields out of a JSON object while it is still streaming.
+
+    feed() returns the (name, value) pairs whose closing quote has arrived, so a
+    field can be sent to the client before the rest of the object is generated.
+    """
+
+    def __init__(self, fields):
+        self.pending = list(fields)
+        self.buffer = ""
+        self._starts = {name: re.compile(r'"%s"\s*:\s*"' % re.escape(name)) for name in fields}
+
+    def feed(self, text):
+        self.buffer += text
+        finished = []
+        for name in list(self.pending):
+            match = self._starts[name].search(self.buffer)
+            if match is None:
+                continue
+            end = self._closing_quote(match.end())
+            if end is None:
+                continue
+            try:
+                value = json.loads(self.buffer[match.end() - 1:end + 1])
+            except json.JSONDecodeError:
+                continue
+            self.pending.remove(name)
+            finished.append((name, value))
+        return finished
+
+    def _closing_quote(self, start):
+        escaped = False
+        for i in range(start, len(self.buffer)):
+            ch = self.buffer[i]
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                return i
+        return None
@@ -0,0 +1,348 @@
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import ipaddress
+import hashlib
+import asyncio
+import logging
+import threading
+import httpx
+from urllib.parse import urlsplit
+
+from core.executor import PoolSaturatedError
+from core.metrics import inc, registry
+
+logger = logging.getLogger(__name__)
+
+TASK_QUEUE_PATH = os.getenv("TASK_QUEUE_PATH", "data/tasks.sqlite3")
+TASK_WORKERS = int(os.getenv("TASK_WORKERS", "2"))
+TASK_RESULT_TTL_SECONDS = float(os.getenv("TASK_RESULT_TTL_SECONDS", str(24 * 3600)))
+# A claimed task whose worker died is handed out again once its lease runs out
+TASK_LEASE_SECONDS = float(os.getenv("TASK_LEASE_SECONDS", "600"))
+TASK_MAX_ATTEMPTS = int(os.getenv("TASK_MAX_ATTEMPTS", "3"))
+TASK_POLL_SECONDS = float(os.getenv("TASK_POLL_SECONDS", "1"))
+WEBHOOK_TIMEOUT_SECONDS = float(os.getenv("WEBHOOK_TIMEOUT_SECONDS", "10"))
+WEBHOOK_ATTEMPTS = 3
+# Comma-separated hosts webhooks may target; when empty, any public address is allowed
+WEBHOOK_ALLOWED_HOSTS = {h.strip().lower() for h in os.getenv("WEBHOOK_ALLOWED_HOSTS", "").split(",") if h.strip()}
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS tasks ("
+    "id TEXT PRIMARY KEY, kind TEXT NOT NULL, payload TEXT NOT NULL, data BLOB, dedup_key TEXT NOT NULL, "
+    "priority INTEGER NOT NULL DEFAULT 0, status TEXT NOT NULL, result TEXT, error TEXT, "
+    "attempts INTEGER NOT NULL DEFAULT 0, created_at REAL NOT NULL, available_at REAL NOT NULL, "
+    "started_at REAL, finished_at REAL, lease_until REAL)",
+    "CREATE INDEX IF NOT EXISTS tasks_ready ON tasks (status, priority DESC, created_at)",
+    "CREATE INDEX IF NOT EXISTS tasks_dedup ON tasks (dedup_key)",
+    "CREATE TABLE IF NOT EXISTS task_webhooks (task_id TEXT NOT NULL, url TEXT NOT NULL, PRIMARY KEY (task_id, url))",
+)
+
+PUBLIC_FIELDS = ("id", "kind", "status", "priority", "attempts", "created_at", "started_at", "finished_at")
+
+
+class InvalidWebhookError(ValueError):
+    pass
+
+
+def validate_webhook_url(url, allowed_hosts=None):
+    """Raises InvalidWebhookError unless `url` is http(s) and points at an allowed, public host.
+
+    Resolves the host, so call it off the event loop.
+    """
+    allowed_hosts = WEBHOOK_ALLOWED_HOSTS if allowed_hosts is None else allowed_hosts
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise InvalidWebhookError("webhook_url must be an http or https URL")
+    host = parts.hostname.lower()
+    if allowed_hosts:
+        if host not in allowed_hosts:
+            raise InvalidWebhookError(f"webhook_url host {host} is not allowed")
+        return
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, parts.port or 443, proto=socket.IPPROTO_TCP)}
+    except (socket.gaierror, UnicodeError):
+        raise InvalidWebhookError(f"webhook_url host {host} does not resolve")
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split("%")[0])
+        # Every address must be public, or the server could be pointed at itself or its network
+        if not ip.is_global or ip.is_multicast:
+            raise InvalidWebhookError(f"webhook_url host {host} resolves to a non-public address")
+
+
+def dedup_key(kind, payload, data=None) -> str:
+    digest = hashlib.sha256()
+    digest.update(kind.encode())
+    digest.update(b"\0")
+    digest.update(json.dumps(payload, sort_keys=True).encode())
+    if data is not None:
+        digest.update(b"\0")
+        digest.update(hashlib.sha256(data).digest())
+    return digest.hexdigest()
+
+
+class TaskQueue:
+    # SQLite-backed queue drained by in-process workers; several app processes can share the file
+    def __init__(self, path=TASK_QUEUE_PATH, workers=TASK_WORKERS, result_ttl=TASK_RESULT_TTL_SECONDS):
+        self.path = path
+        self.workers = workers
+        self.result_ttl = result_ttl
+        self.handlers = {}
+        self.reuse_finished = {}
+        self._db = None
+        self._lock = threading.Lock()
+        self._wakeup = None
+        self._loop = None
+        self._tasks = []
+        self._client = None
+
+    def register(self, kind, handler, reuse_finished=True):
+        # handler(payload: dict, data: bytes | None) -> JSON-serialisable result
+        # reuse_finished=False for results that point at per-process state, which a later caller can't rely on
+        self.handlers[kind] = handler
+        self.reuse_finished[kind] = reuse_finished
+
+    def _conn(self):
+        if self._db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Autocommit mode so claims can take an explicit write lock (BEGIN IMMEDIATE)
+            self._db = sqlite3.connect(self.path or ":memory:", check_same_thread=False, isolation_level=None)
+            self._db.row_factory = sqlite3.Row
+            self._db.execute("PRAGMA journal_mode=WAL")
+            for statement in SCHEMA:
+                self._db.execute(statement)
+        return self._db
+
+    def submit(self, kind, payload, data=None, priority=0, webhook_url=None):
+        """Returns (task, deduplicated); identical queued or running jobs (and finished ones, if allowed) are reused."""
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown task kind: {kind}")
+        if webhook_url:
+            validate_webhook_url(webhook_url)
+        key = dedup_key(kind, payload, data)
+        reusable = ("queued", "running", "done") if self.reuse_finished[kind] else ("queued", "running")
+        now = time.time()
+        with self._lock:
+            db = self._conn()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute(
+                    f"SELECT id, status, priority FROM tasks WHERE dedup_key = ? "
+                    f"AND status IN ({', '.join('?' * len(reusable))}) ORDER BY created_at DESC LIMIT 1",
+                    (key, *reusable),
+                ).fetchone()
+                deduplicated = row is not None
+                if deduplicated:
+                    task_id = row["id"]
+                    if row["status"] == "queued" and priority > row["priority"]:
+                        # The more urgent submitter decides where the shared job sits in the queue
+                        db.execute("UPDATE tasks SET priority = ? WHERE id = ?", (priority, task_id))
+                else:
+                    task_id = uuid.uuid4().hex
+                    db.execute(
+                        "INSERT INTO tasks (id, kind, payload, data, dedup_key, priority, status, created_at, "
+                        "available_at) VALUES (?, ?, ?, ?, ?, ?, 'queued', ?, ?)",
+                        (task_id, kind, json.dumps(payload), data, key, priority, now, now),
+                    )
+                if webhook_url and (not deduplicated or row["status"] in ("queued", "running")):
+                    db.execute("INSERT OR IGNORE INTO task_webhooks (task_id, url) VALUES (?, ?)", (task_id, webhook_url))
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+
+        inc("tasks_submitted_total", {"kind": kind, "deduplicated": str(deduplicated).lower()})
+        if self._wakeup is not None:
+            # submit() may run in a worker thread; asyncio.Event is only safe to touch from its loop
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        return self.get(task_id), deduplicated
+
+    def get(self, task_id):
+        with self._lock:
+            row = self._conn().execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
+            if row is None:
+                return None
+            position = None
+            if row["status"] == "queued":
+                position = self._conn().execute(
+                    "SELECT COUNT(*) FROM tasks WHERE status = 'queued' AND "
+                    "(priority > ? OR (priority = ? AND created_at < ?))",
+                    (row["priority"], row["priority"], row["created_at"]),
+                ).fetchone()[0]
+        task = {name: row[name] for name in PUBLIC_FIELDS}
+        if position is not None:
+            task["queue_position"] = position
+        if row["status"] == "done":
+            task["result"] = json.loads(row["result"])
+        if row["status"] == "failed":
+            task["error"] = row["error"]
+        return task
+
+    def _claim(self):
+        now = time.time()
+        with self._lock:
+            db = self._conn()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute(
+                    "SELECT * FROM tasks WHERE (status = 'queued' AND available_at <= ?) "
+                    "OR (status = 'running' AND lease_until < ?) "
+                    "ORDER BY priority DESC, created_at LIMIT 1",
+                    (now, now),
+                ).fetchone()
+                if row is not None:
+                    db.execute(
+                        "UPDATE tasks SET status = 'running', started_at = ?, lease_until = ?, attempts = attempts + 1 "
+                        "WHERE id = ?",
+                        (now, now + TASK_LEASE_SECONDS, row["id"]),
+                    )
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        return row
+
+    def _finish(self, task_id, status, result=None, error=None):
+        with self._lock:
+            self._conn().execute(
+                "UPDATE tasks SET status = ?, result = ?, error = ?, finished_at = ?, data = NULL, lease_until = NULL "
+                "WHERE id = ?",
+                (status, None if result is None else json.dumps(result), error, time.time(), task_id),
+            )
+
+    def _requeue(self, task_id, delay):
+        # Only a running task goes back; one that finished (e.g. cancelled mid-webhook) keeps its result
+        with self._lock:
+            self._conn().execute(
+                "UPDATE tasks SET status = 'queued', available_at = ?, lease_until = NULL "
+                "WHERE id = ? AND status = 'running'",
+                (time.time() + delay, task_id),
+            )
+
+    def _webhooks(self, task_id):
+        with self._lock:
+            rows = self._conn().execute("SELECT url FROM task_webhooks WHERE task_id = ?", (task_id,)).fetchall()
+        return [row["url"] for row in rows]
+
+    def purge_expired(self):
+        with self._lock:
+            db = self._conn()
+            expired = [row["id"] for row in db.execute(
+                "SELECT id FROM tasks WHERE status IN ('done', 'failed') AND finished_at < ?",
+                (time.time() - self.result_ttl,),
+            )]
+            for task_id in expired:
+                db.execute("DELETE FROM task_webhooks WHERE task_id = ?", (task_id,))
+                db.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+        return len(expired)
+
+    async def _run(self, row):
+        kind = row["kind"]
+        registry.observe("task_wait_seconds", time.time() - row["available_at"], {"kind": kind})
+        started = time.perf_counter()
+        handler = self.handlers.get(kind)
+        try:
+            if handler is None:
+                raise ValueError(f"No handler registered for {kind}")
+            result = await handler(json.loads(row["payload"]), row["data"])
+        except PoolSaturatedError as e:
+            # Interactive traffic has the workers busy; try again shortly instead of failing.
+            # row holds the count from before this claim, which already used up one attempt.
+            if row["attempts"] + 1 < TASK_MAX_ATTEMPTS:
+                await asyncio.to_thread(self._requeue, row["id"], e.retry_after)
+                inc("tasks_total", {"kind": kind, "status": "requeued"})
+                return
+            await asyncio.to_thread(
+                self._finish, row["id"], "failed", error=f"Workers still saturated after {row['attempts'] + 1} attempts: {e}"
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Task {row['id']} ({kind}) failed: {e}")
+            await asyncio.to_thread(self._finish, row["id"], "failed", error=str(e))
+        else:
+            await asyncio.to_thread(self._finish, row["id"], "done", result=result)
+        finally:
+            registry.observe("task_run_seconds", time.perf_counter() - started, {"kind": kind})
+
+        task = await asyncio.to_thread(self.get, row["id"])
+        inc("tasks_total", {"kind": kind, "status": task["status"]})
+        for url in await asyncio.to_thread(self._webhooks, row["id"]):
+            await self._notify(url, task)
+
+    async def _notify(self, url, task):
+        # Checked again at delivery: the host's DNS may have changed since submit
+        try:
+            await asyncio.to_thread(validate_webhook_url, url)
+        except InvalidWebhookError as e:
+            logger.warning(f"⚠️ Webhook {url} for task {task['id']} skipped: {e}")
+            inc("task_webhooks_total", {"outcome": "blocked"})
+            return
+        for attempt in range(WEBHOOK_ATTEMPTS):
+            try:
+                response = await self._client.post(url, json=task)
+                if response.status_code < 500:
+                    inc("task_webhooks_total", {"outcome": "ok" if response.is_success else "rejected"})
+                    return
+            except httpx.HTTPError as e:
+                logger.warning(f"⚠️ Webhook {url} for task {task['id']} failed: {e}")
+            await asyncio.sleep(2 ** attempt)
+        inc("task_webhooks_total", {"outcome": "failed"})
+
+    async def _worker(self):
+        last_purge = 0.0
+        while True:
+            row = await asyncio.to_thread(self._claim)
+            if row is None:
+                if time.monotonic() - last_purge > 60:
+                    last_purge = time.monotonic()
+                    await asyncio.to_thread(self.purge_expired)
+                # Woken by submit() in this process; the timeout picks up work from other processes
+                self._wakeup.clear()
+                # asyncio.wait rather than wait_for: on 3.11 wait_for drops a cancel that lands as the event fires
+                waiter = asyncio.ensure_future(self._wakeup.wait())
+                try:
+                    await asyncio.wait([waiter], timeout=TASK_POLL_SECONDS)
+                finally:
+                    waiter.cancel()
+                continue
+            if row["attempts"] >= TASK_MAX_ATTEMPTS:
+                # Its lease ran out this many times; most likely it takes the worker down with it
+                await asyncio.to_thread(
+                    self._finish, row["id"], "failed", error=f"Lease expired on all {row['attempts']} attempts"
+                )
+                inc("tasks_total", {"kind": row["kind"], "status": "failed"})
+                continue
+            try:
+                await self._run(row)
+            except asyncio.CancelledError:
+                # Shutting down: put the job back for the next worker rather than waiting out the lease
+                await asyncio.to_thread(self._requeue, row["id"], 0)
+                raise
+
+    def start(self, transport=None):
+        if self._tasks or self.workers <= 0:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._client = httpx.AsyncClient(timeout=WEBHOOK_TIMEOUT_SECONDS, transport=transport)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self):
+        with self._lock:
+            rows = self._conn().execute("SELECT status, COUNT(*) AS n FROM tasks GROUP BY status").fetchall()
+        return {"workers": self.workers, "running_workers": len(self._tasks), **{row["status"]: row["n"] for row in rows}}
+
+
+task_queue = TaskQueue()
@@ -0,0 +1,197 @@
+"""Read-only, memory-mapped embedding store shared by every worker on a host.
+
+One writer (`python -m core.vector_store build`) encodes the skill taxonomy and the
+career files into a single file and swaps it into place; workers map it read-only,
+so its pages live once in the OS page cache no matter how many workers there are.
+"""
+import os
+import sys
+import json
+import time
+import struct
+import hashlib
+import logging
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+VECTOR_STORE_PATH = os.getenv("VECTOR_STORE_PATH", "data/vector_store.bin")
+# How often readers stat the file to pick up a refreshed store
+VECTOR_STORE_CHECK_SECONDS = float(os.getenv("VECTOR_STORE_CHECK_SECONDS", "30"))
+
+MAGIC = b"CVS1"
+ALIGNMENT = 64
+
+
+def key_hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_vector_store(path, version, tables):
+    """`tables` maps name -> (keys, matrix[, key]); rows keep their input order."""
+    layout = {}
+    blobs = []
+    offset = 0
+    for name, table in tables.items():
+        keys, matrix = table[0], np.ascontiguousarray(table[1], dtype=np.float32)
+        hashes = np.array([key_hash(k) for k in keys], dtype=np.uint64)
+        order = np.argsort(hashes, kind="stable")
+        parts = {"hashes": hashes[order], "rows": order.astype(np.int64), "vectors": matrix}
+        entry = {"count": len(keys), "dim": int(matrix.shape[1]) if matrix.ndim == 2 else 0}
+        if len(table) > 2:
+            entry["key"] = table[2]
+        for part, array in parts.items():
+            offset = _align(offset)
+            entry[f"{part}_offset"] = offset
+            blobs.append((offset, array))
+            offset += array.nbytes
+        layout[name] = entry
+
+    header = json.dumps({"version": version, "tables": layout}).encode()
+    data_start = _align(len(MAGIC) + 4 + len(header))
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(header)) + header)
+        for part_offset, array in blobs:
+            f.seek(data_start + part_offset)
+            f.write(array.tobytes())
+    # Readers keep their mapping of the old inode until they reopen
+    os.replace(tmp_path, path)
+
+
+class _Table:
+    def __init__(self, path, data_start, entry):
+        count, dim = entry["count"], entry["dim"]
+        self.key = entry.get("key")
+        self.hashes = self._map(path, np.uint64, data_start + entry["hashes_offset"], (count,))
+        self.rows = self._map(path, np.int64, data_start + entry["rows_offset"], (count,))
+        self.vectors = self._map(path, np.float32, data_start + entry["vectors_offset"], (count, dim))
+
+    @staticmethod
+    def _map(path, dtype, offset, shape):
+        # mmap refuses zero-length regions
+        if not shape[0]:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(path, dtype, "r", offset, shape)
+
+    def lookup(self, keys):
+        # Binary search over the sorted hashes; only the touched pages are read
+        if not len(self.hashes):
+            return [None] * len(keys)
+        wanted = np.array([key_hash(k) for k in keys], dtype=np.uint64)
+        positions = np.minimum(np.searchsorted(self.hashes, wanted), len(self.hashes) - 1)
+        found = self.hashes[positions] == wanted
+        return [self.vectors[self.rows[p]] if ok else None for p, ok in zip(positions, found)]
+
+
+class SharedVectorStore:
+    def __init__(self, path=VECTOR_STORE_PATH, version="", check_interval=VECTOR_STORE_CHECK_SECONDS):
+        self.path = path
+        self.version = version
+        self.check_interval = check_interval
+        self._tables = {}
+        self._identity = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        now = time.monotonic()
+        if now - self._checked < self.check_interval and self._identity is not None:
+            return self._tables
+        with self._lock:
+            self._checked = now
+            try:
+                stat = os.stat(self.path)
+            except OSError:
+                self._tables, self._identity = {}, None
+                return self._tables
+            identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            if identity != self._identity:
+                self._tables = self._open()
+                self._identity = identity
+            return self._tables
+
+    def _open(self):
+        try:
+            with open(self.path, "rb") as f:
+                if f.read(len(MAGIC)) != MAGIC:
+                    raise ValueError("not a vector store file")
+                (header_len,) = struct.unpack("<I", f.read(4))
+                header = json.loads(f.read(header_len))
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Ignoring vector store {self.path}: {e}")
+            return {}
+        if header.get("version") != self.version:
+            logger.info(f"Vector store {self.path} was built for {header.get('version')}, ignoring it")
+            return {}
+        data_start = _align(len(MAGIC) + 4 + header_len)
+        return {name: _Table(self.path, data_start, entry) for name, entry in header["tables"].items()}
+
+    def get_many(self, table, keys):
+        """Vectors for `keys` (read-only views into the mapping), None where absent."""
+        found = self._refresh().get(table)
+        if found is None:
+            return [None] * len(keys)
+        return found.lookup(keys)
+
+    def matrix(self, table, key=None):
+        # Whole table in row order, e.g. the career matrix; `key` guards against stale content
+        found = self._refresh().get(table)
+        if found is None or (key is not None and found.key != key):
+            return None
+        return found.vectors
+
+    def stats(self):
+        tables = self._refresh()
+        return {
+            "path": self.path,
+            "loaded": bool(tables),
+            "tables": {name: int(len(table.hashes)) for name, table in tables.items()},
+        }
+
+
+def build(path=VECTOR_STORE_PATH, career_files=None):
+    # Imported here so reader processes never pay for the encoder just to open the store
+    from core.embedder import EMBEDDING_VERSION, canonical_skill, embed_skill_vectors, skill_cache
+    from core.career_index import CAREER_PATHS_FILE, career_matrix, load_careers
+    from core.skills_db import load_skill_taxonomy
+
+    # Skills seen in traffic (SKILL_CACHE_FILE) ride along with the taxonomy
+    skills = set(skill_cache.keys())
+    for canonical, aliases in load_skill_taxonomy().items():
+        skills.update(canonical_skill(s) for s in [canonical, *aliases])
+
+    tables = {}
+    for career_file in career_files or [CAREER_PATHS_FILE]:
+        careers, key = load_careers(career_file)
+        matrix = career_matrix(career_file, careers, key)
+        for career in careers:
+            skills.update(canonical_skill(s) for s in career.get("required_skills", []))
+        tables[f"careers:{os.path.basename(career_file)}"] = ([str(i) for i in range(len(careers))], matrix, key)
+
+    skills = sorted(s for s in skills if s)
+    tables["skills"] = (skills, embed_skill_vectors(skills))
+    write_vector_store(path, EMBEDDING_VERSION, tables)
+    return {name: len(table[0]) for name, table in tables.items()}
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if not args or args[0] != "build":
+        sys.exit("usage: python -m core.vector_store build [--every SECONDS] [CAREERS_JSON ...]")
+    every = 0.0
+    if len(args) > 2 and args[1] == "--every":
+        every = float(args[2])
+        args = args[2:]
+    # The single writer: rebuild now, and keep refreshing if asked to
+    while True:
+        print(json.dumps(build(career_files=args[1:] or None)), flush=True)
+        if not every:
+            break
+        time.sleep(every)
@@ -0,0 +1,24 @@
+import logging
+
+from core.readiness import mark_failed
+from core.gemini import get_genai
+from core.embedder import warm_embedder
+from core.career_index import get_career_index
+
+logger = logging.getLogger(__name__)
+
+WARMUP_STEPS = (
+    ("gemini", get_genai),
+    ("embedder", warm_embedder),
+    ("career_index", get_career_index),
+)
+
+
+def warm_up():
+    # Runs in a worker thread after startup so the app can serve requests immediately
+    for name, load in WARMUP_STEPS:
+        try:
+            load()
+        except Exception as e:
+            logger.error(f"❌ Warm-up failed for {name}: {e}")
+            mark_failed(name, e)
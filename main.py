@@ -1,10 +1,47 @@
 import os
+import time
+import asyncio
+import logging
 import uvicorn
+from contextlib import asynccontextmanager
 from api.routes import router
-from fastapi import FastAPI
+from core.embedder import save_skill_cache
+from core.job_index import save_job_index
+from core.salary_fetcher import salary_service
+from core.warmup import warm_up
+from core.executor import PoolSaturatedError, stage_pool
+from core.task_queue import task_queue
+from core.metrics import prompt_tokens_header, registry, request_prompt_tokens, request_timings, server_timing_header
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI(title="AI Career Recommender")
+
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Heavy components (Gemini client, embedder, career index) load in the background
+    # so the app starts serving immediately; /ready reports when they are available.
+    warmup_task = None
+    if os.getenv("WARMUP_ON_STARTUP", "1") != "0":
+        warmup_task = asyncio.create_task(asyncio.to_thread(warm_up))
+    task_queue.start()
+    yield
+    await task_queue.stop()
+    if warmup_task is not None and not warmup_task.done():
+        await asyncio.wait([warmup_task], timeout=5)
+    save_skill_cache()
+    save_job_index()
+    await salary_service.aclose()
+    stage_pool.shutdown()
+
+
+app = FastAPI(title="AI Career Recommender", lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -15,6 +52,45 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def instrument_requests(request: Request, call_next):
+    # Stage timers inside the handler append to this list; it becomes the Server-Timing header
+    timings = []
+    prompt_tokens = []
+    token = request_timings.set(timings)
+    tokens_token = request_prompt_tokens.set(prompt_tokens)
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        request_timings.reset(token)
+        request_prompt_tokens.reset(tokens_token)
+    elapsed = time.perf_counter() - started
+
+    route = request.scope.get("route")
+    registry.observe(
+        "http_request_duration_seconds",
+        elapsed,
+        {"method": request.method, "route": getattr(route, "path", "unmatched"), "status": response.status_code},
+        "End-to-end request latency",
+    )
+    response.headers["Server-Timing"] = server_timing_header(timings, elapsed)
+    if prompt_tokens:
+        response.headers["X-Prompt-Tokens"] = prompt_tokens_header(prompt_tokens)
+    return response
+
+
+@app.exception_handler(PoolSaturatedError)
+async def pool_saturated_handler(request: Request, exc: PoolSaturatedError):
+    # Shed load predictably instead of queueing without bound
+    return JSONResponse(
+        status_code=503,
+        content={"error": "Server busy, please retry", "stage": exc.stage},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
 # Include your API router
 app.include_router(router)
 